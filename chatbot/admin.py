@@ -1,41 +1,218 @@
-from django.contrib import admin
+import hashlib
+from itertools import islice
+from django.contrib import admin, messages
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .ai_processor import MentalHealthChatbot
 from .models import UserProfile, Conversation, Message, MoodEntry, SupportResource
+from .utils import SUPPORT_RESOURCE_CACHE_VERSION_KEY, BulkAdminActionContext
+
+SUPPORT_RESOURCE_CACHE_TIMEOUT = 60
+BULK_UPDATE_BATCH_SIZE = 1000
+LOG_ENTRY_BATCH_SIZE = 1000
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def _is_changelist_view(request):
+    """True for plain changelist page loads (not actions posted from it)"""
+    match = request.resolver_match
+    return request.method == 'GET' and match is not None and (match.url_name or '').endswith('_changelist')
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses PostgreSQL's planner estimate for large unfiltered tables"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        # Estimates are only meaningful for the whole table, not a filtered search
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return super().count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        estimate = row[0] if row else 0
+        return estimate if estimate > ESTIMATED_COUNT_THRESHOLD else super().count
+
+
+def _log_bulk_change(request, objects, message):
+    """Record admin history for a bulk action with one INSERT per batch"""
+    for start in range(0, len(objects), LOG_ENTRY_BATCH_SIZE):
+        LogEntry.objects.log_actions(
+            user_id=request.user.pk,
+            queryset=objects[start:start + LOG_ENTRY_BATCH_SIZE],
+            action_flag=CHANGE,
+            change_message=message
+        )
+
+
+@admin.action(description='Mark selected conversations inactive')
+def mark_inactive(modeladmin, request, queryset):
+    queryset = queryset.filter(is_active=True)
+    conversations = list(queryset.select_related(None).only('id', 'session_id'))
+    updated = queryset.update(is_active=False, ended_at=timezone.now())
+    _log_bulk_change(request, conversations, 'Marked inactive.')
+    modeladmin.message_user(request, f'{updated} conversation(s) marked inactive.')
+
+
+@admin.action(description='Recalculate sentiment scores')
+def recalculate_sentiment(modeladmin, request, queryset):
+    chatbot = MentalHealthChatbot()
+    message_iter = queryset.select_related(None).only('id', 'content').iterator(chunk_size=BULK_UPDATE_BATCH_SIZE)
+    with BulkAdminActionContext(Message, batch_size=BULK_UPDATE_BATCH_SIZE) as ctx:
+        # Score each chunk of messages in one call
+        while batch := list(islice(message_iter, BULK_UPDATE_BATCH_SIZE)):
+            scores = chatbot.analyze_sentiment_batch(message.content for message in batch)
+            for message, score in zip(batch, scores):
+                message.sentiment_score = score
+                ctx.update(message, fields=['sentiment_score'])
+    modeladmin.message_user(request, f'Sentiment recalculated for {ctx.updated} message(s).')
+
+
+@admin.action(description='Remove notes from selected mood entries')
+def clear_notes(modeladmin, request, queryset):
+    queryset = queryset.exclude(notes='')
+    mood_entries = list(queryset.select_related(None).only('id', 'mood_level', 'created_at'))
+    updated = queryset.update(notes='')
+    _log_bulk_change(request, mood_entries, 'Removed notes.')
+    modeladmin.message_user(request, f'Notes removed from {updated} mood entry(ies).')
+
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'age', 'consent_given', 'created_at']
-    list_filter = ['consent_given', 'privacy_accepted', 'created_at']
-    search_fields = ['user__username', 'user__email']
+    list_filter = ['consent_given', 'privacy_accepted']
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+    list_per_page = 25
+    sortable_by = ('created_at',)
+    search_fields = ['=user__email', '^user__username']
+    list_select_related = ('user',)
+    autocomplete_fields = ['user']
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
-    list_display = ['session_id', 'user', 'started_at', 'is_active']
-    list_filter = ['is_active', 'started_at']
-    search_fields = ['session_id', 'user__username']
+    list_display = ['session_id', 'user', 'started_at', 'is_active', 'message_count']
+    list_filter = ['is_active']
+    date_hierarchy = 'started_at'
+    show_full_result_count = False
+    list_per_page = 25
+    sortable_by = ('started_at', 'is_active')
+    search_fields = ['session_id', '=user__email', '^user__username']
     readonly_fields = ['session_id']
+    list_select_related = ('user',)
+    actions = [mark_inactive]
+    autocomplete_fields = ['user']
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request).select_related('user')
+        if _is_changelist_view(request):
+            # One GROUP BY for the page instead of a COUNT(*) per row
+            qs = qs.annotate(_message_count=Count('messages'))
+        return qs
+
+    def message_count(self, obj):
+        return obj._message_count
+    message_count.short_description = 'Messages'
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['conversation', 'message_type', 'content_preview', 'timestamp']
-    list_filter = ['message_type', 'timestamp']
+    list_filter = ['message_type']
+    date_hierarchy = 'timestamp'
+    show_full_result_count = False
+    list_per_page = 25
+    sortable_by = ('timestamp', 'message_type')
     search_fields = ['content']
-    readonly_fields = ['timestamp']
-    
-    def content_preview(self, obj):
-        return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Content Preview'
+    readonly_fields = ['timestamp', 'content_preview']
+    list_select_related = ('conversation', 'conversation__user')
+    actions = [recalculate_sentiment]
+    paginator = EstimatedCountPaginator
+    fieldsets = [
+        (None, {'fields': ['conversation', 'message_type', 'content']}),
+        ('Details', {'fields': ['sentiment_score', 'timestamp', 'content_preview']}),
+    ]
+    autocomplete_fields = ['conversation']
+
+    def get_queryset(self, request):
+        # search_vector is only ever used inside the database
+        qs = super().get_queryset(request).select_related('conversation__user').defer('search_vector')
+        if _is_changelist_view(request):
+            qs = qs.defer('content')
+        return qs
+
+    def get_search_results(self, request, queryset, search_term):
+        # PostgreSQL keeps a GIN-indexed tsvector over content and username;
+        # other backends fall back to the regular search_fields lookup
+        if not search_term or connections[queryset.db].vendor != 'postgresql':
+            return super().get_search_results(request, queryset, search_term)
+        query = SearchQuery(search_term, config='english', search_type='websearch')
+        return queryset.filter(search_vector=query), False
 
 @admin.register(MoodEntry)
 class MoodEntryAdmin(admin.ModelAdmin):
     list_display = ['user', 'mood_level', 'created_at']
-    list_filter = ['mood_level', 'created_at']
-    search_fields = ['user__username', 'notes']
+    list_filter = ['mood_level']
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+    list_per_page = 25
+    sortable_by = ('mood_level', 'created_at')
+    search_fields = ['=user__email', '^user__username', 'notes']
+    list_select_related = ('user',)
+    actions = [clear_notes]
+    autocomplete_fields = ['user', 'conversation']
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request).select_related('user')
+        if _is_changelist_view(request):
+            # Only the displayed columns; skips notes and the other wide fields
+            qs = qs.only('id', 'user__username', 'mood_level', 'created_at')
+        return qs
 
 @admin.register(SupportResource)
 class SupportResourceAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'is_emergency', 'created_at']
-    list_filter = ['category', 'is_emergency', 'created_at']
+    list_filter = ['category', 'is_emergency']
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+    list_per_page = 25
+    sortable_by = ('category', 'is_emergency', 'created_at')
     search_fields = ['title', 'description']
 
+    def changelist_view(self, request, extra_context=None):
+        # Resources change rarely, so serve the rendered list page from cache.
+        # Admin responses are never_cache and set cookies, which rules out
+        # cache_page, so the body is cached per session and URL instead. Pages
+        # that carry a flash message (e.g. right after a save) are rendered fresh.
+        # Permission checks run inside changelist_view, so users without access
+        # always go through it rather than being served a cached page.
+        if (request.method != 'GET' or len(messages.get_messages(request))
+                or not self.has_view_or_change_permission(request)):
+            return super().changelist_view(request, extra_context)
+
+        version = cache.get_or_set(SUPPORT_RESOURCE_CACHE_VERSION_KEY, 1, None)
+        page_key = hashlib.md5(
+            f'{request.session.session_key}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+        cache_key = f'support_resource_admin_{version}_{page_key}'
+
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content)
 
-    #nothing
\ No newline at end of file
+        response = super().changelist_view(request, extra_context)
+        if response.status_code == 200 and hasattr(response, 'render'):
+            response.render()
+            cache.set(cache_key, response.content, SUPPORT_RESOURCE_CACHE_TIMEOUT)
+        return response
@@ -1,291 +1,532 @@
+import asyncio
+import hashlib
+import json
 import random
 import re
-from textblob import TextBlob
+import string
+import threading
+import weakref
+from functools import lru_cache
+from pathlib import Path
 import logging
 import openai 
 from django.conf import settings
+from django.core.cache import cache
 
 # Initialize logger immediately after importing logging
 logger = logging.getLogger(__name__)
 
-# For enhanced tokenization/lemmatization (if NLTK is installed, otherwise fallback)
-NLTK_AVAILABLE = False
-try:
-    import nltk
-    from nltk.stem import WordNetLemmatizer
-    from nltk.corpus import stopwords
-    
+# Deletes punctuation in one C-level pass (ASCII plus the curly quotes and dashes
+# phone keyboards insert)
+_PUNCT_TBL = str.maketrans('', '', string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026')
+
+# AFINN-111 word list (Finn Årup Nielsen, ODbL - see data/AFINN-LICENSE.md):
+# word -> integer valence from -5 to 5, loaded once per process. Entries are
+# normalized like messages ("can't stand" -> "cant stand"); multi-word ones go
+# into a phrase table, see _sentiment_score.
+_AFINN_PATH = Path(__file__).resolve().parent / 'data' / 'AFINN-111.txt'
+
+
+def _load_afinn(path):
+    """Read the AFINN list into ({word: valence}, {multi-word phrase: valence})"""
+    words = {}
+    phrases = {}
+    with open(path, encoding='utf-8') as afinn_file:
+        for line in afinn_file:
+            if line.strip():
+                entry, score = line.rstrip('\n').split('\t')
+                entry = ' '.join(entry.translate(_PUNCT_TBL).split())
+                (phrases if ' ' in entry else words)[entry] = int(score)
+    return words, phrases
+
+
+_AFINN, _afinn_phrases = _load_afinn(_AFINN_PATH)
+
+# Words that flip (and dampen) the valence of the next few words: "not happy"
+# scores like a mildly negative word rather than like "happy"
+_NEGATIONS = frozenset((
+    'not', 'no', 'never', 'nothing', 'nobody', 'none', 'neither', 'nor', 'without',
+    'dont', 'doesnt', 'didnt', 'cant', 'cannot', 'couldnt', 'wont', 'wouldnt',
+    'shouldnt', 'isnt', 'arent', 'wasnt', 'werent', 'havent', 'hasnt', 'aint'
+))
+NEGATION_SCOPE = 3
+NEGATION_FACTOR = -0.5
+
+# For enhanced tokenization/lemmatization (if NLTK is installed, otherwise fallback).
+# Finding (or downloading) the NLTK data is slow, so it happens on first use rather
+# than at import. None means "not checked yet".
+NLTK_AVAILABLE = None
+# Messages shorter than this that are plain ASCII skip NLTK altogether
+NLTK_MIN_MESSAGE_LENGTH = 64
+_nltk_lock = threading.Lock()
+_lemmatize = None
+_stop_words = frozenset()
+
+
+def _load_nltk():
+    """Import NLTK and its wordnet/stopwords data; returns whether it is usable"""
+    global _lemmatize, _stop_words
+    try:
+        import nltk
+        from nltk.stem import WordNetLemmatizer
+        from nltk.corpus import stopwords
+    except ImportError:
+        logger.warning("NLTK not installed. Some advanced text processing (lemmatization, stopwords) will be skipped.")
+        return False
+
     # MODIFIED NLTK DATA DOWNLOAD & CHECK
     try:
         nltk.data.find('corpora/wordnet.zip')
         nltk.data.find('corpora/stopwords.zip')
-        NLTK_AVAILABLE = True
-        lemmatizer = WordNetLemmatizer()
-        stop_words = set(stopwords.words('english'))
     except LookupError:
         logger.warning("NLTK data (wordnet/stopwords) not found. Attempting auto-download. This might take a moment.")
         try:
             nltk.download('wordnet', quiet=True) 
             nltk.download('stopwords', quiet=True)
-            NLTK_AVAILABLE = True
-            lemmatizer = WordNetLemmatizer()
-            stop_words = set(stopwords.words('english'))
+            stop_words = frozenset(stopwords.words('english'))
             logger.info("NLTK data downloaded successfully.")
         except Exception as e: 
             logger.error(f"Failed to auto-download NLTK data: {e}. Advanced text processing will be skipped.")
-            NLTK_AVAILABLE = False
+            return False
+    else:
+        stop_words = frozenset(stopwords.words('english'))
+
+    # Chat vocabulary is small and repetitive, so WordNet lookups are memoized
+    _lemmatize = lru_cache(maxsize=4096)(WordNetLemmatizer().lemmatize)
+    _stop_words = stop_words
+    return True
+
+
+def _ensure_nltk():
+    """Load NLTK once per process (thread-safe); returns NLTK_AVAILABLE"""
+    global NLTK_AVAILABLE
+    if NLTK_AVAILABLE is None:
+        with _nltk_lock:
+            if NLTK_AVAILABLE is None:
+                NLTK_AVAILABLE = _load_nltk()
+    return NLTK_AVAILABLE
+
+
+def _build_crisis_re(keywords, whole_words):
+    """One regex that scans a message for any crisis keyword.
+
+    The leading boundary keeps 'die' out of 'studied'; the closing one, added only
+    for whole_words, keeps it out of 'diet'.
+    """
+    alternatives = [
+        re.escape(keyword) + (r'\b' if keyword in whole_words else '')
+        for keyword in keywords
+    ]
+    return re.compile(r'\b(?:' + '|'.join(alternatives) + r')', re.IGNORECASE)
+
+
+def _build_intent_tables(category_keywords):
+    """Keyword lookup tables for intent matching.
+
+    Single words map to the priority (position) of their category for O(1) token
+    lookups; multi-word phrases are indexed by their first word, so only the
+    tokens that can start a phrase are compared further.
+    Keywords are normalized the same way as messages so that e.g.
+    "can't sleep" can actually match.
+    """
+    intent_order = []
+    keyword_priority = {}
+    phrase_priority = {}
+    for category, keywords in category_keywords.items():
+        if category == 'how_are_you_question': # Handled separately, ahead of everything else
+            continue
+        priority = len(intent_order)
+        intent_order.append(category)
+        for keyword in keywords:
+            normalized = ' '.join(keyword.lower().translate(_PUNCT_TBL).split())
+            table = phrase_priority if ' ' in normalized else keyword_priority
+            table.setdefault(normalized, priority)
+    return tuple(intent_order), keyword_priority, _build_phrase_index(phrase_priority)
+
+
+def _build_phrase_index(phrases):
+    """Index multi-word phrases ({phrase: value}) by their first word"""
+    index = {}
+    for phrase, value in phrases.items():
+        first, *rest = phrase.split()
+        index.setdefault(first, []).append((rest, value))
+    return {first: tuple(entries) for first, entries in index.items()}
+
+
+def _sentiment_score(tokens):
+    """AFINN valence of a token list, scaled to -1.0..1.0.
+
+    Multi-word entries ("fed up", "not good") are matched first and take the place
+    of their words; other words preceded by a negation within NEGATION_SCOPE
+    tokens have their valence multiplied by NEGATION_FACTOR.
+    """
+    score = 0
+    last_negation = -NEGATION_SCOPE - 1
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        length = 1
+        value = 0
+        for rest, phrase_value in _AFINN_PHRASE_INDEX.get(token, ()):
+            if len(rest) >= length and tokens[i + 1:i + 1 + len(rest)] == rest:
+                length = len(rest) + 1
+                value = phrase_value
+        if length == 1:
+            value = _AFINN.get(token, 0)
+            if value and i - last_negation <= NEGATION_SCOPE:
+                value *= NEGATION_FACTOR
+        if token in _NEGATIONS:
+            last_negation = i
+        score += value
+        i += length
+    return max(-1.0, min(1.0, score / 5.0))
+
+
+def _phrase_hits(tokens, phrase_index):
+    """Values of the indexed phrases that occur as consecutive tokens"""
+    hits = []
+    for i, token in enumerate(tokens):
+        for rest, value in phrase_index.get(token, ()):
+            if tokens[i + 1:i + 1 + len(rest)] == rest:
+                hits.append(value)
+    return hits
+
 
-except ImportError:
-    logger.warning("NLTK not installed. Some advanced text processing (lemmatization, stopwords) will be skipped.")
-    NLTK_AVAILABLE = False
+_AFINN_PHRASE_INDEX = _build_phrase_index(_afinn_phrases)
+
+
+# Responses are picked this many at a time per pool, see _next_response
+RESPONSE_BUFFER_SIZE = 16
+
+OPENAI_MODEL = "gpt-3.5-turbo"
+
+# OpenAI replies are cached per (prompt version, model, history, message) so that
+# repeated phrasings skip the API round-trip. Bump the version whenever the system
+# prompt in _build_api_messages changes.
+SYSTEM_PROMPT_VERSION = 1
+OPENAI_REPLY_CACHE_TIMEOUT = 60 * 60
+
+
+@lru_cache(maxsize=None)
+def _openai_client(api_key):
+    """One OpenAI client (and HTTP connection pool) per process and API key"""
+    return openai.OpenAI(api_key=api_key)
+
+
+# Async clients hold an httpx pool bound to the event loop that created them, so
+# they are kept per running loop and API key, and dropped along with their loop
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def _async_openai_client(api_key):
+    """One AsyncOpenAI client (and HTTP connection pool) per event loop and API key"""
+    clients = _async_openai_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = openai.AsyncOpenAI(api_key=api_key)
+    return client
 
 
 class MentalHealthChatbot:
+    # Response pools are read-only, so they are tuples shared by all instances
+    supportive_responses = {
+        'greeting': (
+            "Hello! I'm here to listen and support you. How are you genuinely feeling today?",
+            "Hi there! I'm glad you're here. What's on your mind? I'm ready to listen.",
+            "Welcome! I'm here to provide a safe, non-judgmental space for you to share. How can I help?",
+            "It's good to see you. How are things with you today?",
+            "Hi! I'm here to support you. What's been happening?",
+            "Hey! I'm glad you reached out. What's on your mind?",
+            "Hello! I'm your mental wellness companion. How can I assist you today?"
+        ),
+        'anxiety': (
+            "I understand anxiety can be incredibly overwhelming. Let's take this one step at a time. Can you tell me more about what's causing it?",
+            "Anxiety is a difficult feeling, but you're not alone. Would you like to explore some calming techniques like deep breathing or mindfulness?",
+            "Thank you for sharing that. Anxiety is very real, and your feelings are absolutely valid. What does it feel like for you right now?",
+            "It sounds like you're carrying a lot of worry. I'm here to listen without judgment. Is there anything specific on your mind that's triggering this?",
+            "Anxiety can feel paralyzing. What's one small thing we can focus on right now to help ease that feeling?",
+            "Feeling anxious is tough. How intense is your anxiety on a scale of 1 to 10 right now?",
+            "Anxiety often comes with a racing mind. Would you like to try a grounding exercise?"
+        ),
+        'depression': (
+            "I hear that you're going through a truly tough time. Your feelings are valid and important. I'm here for you.",
+            "Depression can make everything feel heavy and hopeless. I want you to know I'm here to listen without judgment.",
+            "It takes immense courage to reach out when you're feeling low. I'm glad you're here talking about how you feel. What's weighing on you today?",
+            "I can sense the pain in your words. Please know that it's okay to feel this way, and you don't have to carry it alone.",
+            "When depression hits, even small tasks can feel monumental. Just talking about it is a step forward. What's one thing that feels hardest right now?",
+            "It sounds like you're in a dark place. Please remember that feelings are temporary, and support is available.",
+            "I'm sorry to hear you're feeling so down. What's one small thing that might bring a tiny bit of comfort?"
+        ),
+        'stress': (
+            "Stress can be incredibly overwhelming. What's been weighing on your mind lately? Sometimes just talking helps to clear things up.",
+            "It sounds like you're dealing with a lot right now. I'm here to listen. What's contributing to your stress?",
+            "Stress affects us all differently. I'm here to listen to what you're going through. What strategies have you tried to manage it?",
+            "Feeling stressed is a common human experience. Let's explore what might help ease some of that pressure for you.",
+            "Taking on too much can lead to immense stress. What's one small burden you feel you could set down, even for a moment?",
+            "It sounds like you're under a lot of pressure. What's your biggest stressor today?"
+        ),
+        'loneliness': (
+            "I hear you expressing feelings of loneliness. That's a very challenging emotion to carry. Can you tell me more about what that feels like?",
+            "It sounds like you're feeling disconnected. Loneliness is a tough experience, and I want you to know you're not alone in feeling it.",
+            "Reaching out about loneliness is a brave step. Is there anything specific you miss, or any connections you're looking for?",
+            "Feeling lonely can be heavy. I'm here to offer companionship and a listening ear. What's on your mind about it?",
+            "Sometimes loneliness comes from feeling misunderstood. Do you want to talk about that?",
+            "I'm sorry you're feeling lonely. Is there anything you enjoy doing that might help you feel more connected, even if it's a small step?"
+        ),
+        'anger': (
+            "It sounds like you're experiencing a lot of anger right now. That's a powerful emotion. Can you tell me what triggered it?",
+            "Feeling angry is a natural human response sometimes. What's making you feel this way? I'm here to listen.",
+            "It takes courage to acknowledge anger. Let's talk about what's upsetting you.",
+            "Anger can be a sign that something needs attention. What do you feel is being threatened or violated?",
+            "I hear the frustration in your words. What would feel helpful for you to process this anger?",
+            "It sounds like you're feeling a strong sense of anger. I'm here to listen to that. What specifically is making you feel this way?",
+            "It's okay to feel angry. What is the core issue that's making you so upset?"
+        ),
+        'grief': (
+            "I'm so sorry to hear you're experiencing grief. That must be incredibly painful. I'm here to hold space for you.",
+            "Grief is a heavy burden, and it's unique to everyone. Please take your time, and know I'm here to listen to whatever you need to share.",
+            "It takes immense strength to navigate loss. There's no right or wrong way to grieve. What's on your heart right now?",
+            "I hear your sadness and loss. If you wish to talk about what you're going through, I am here.",
+            "It sounds like you're experiencing deep sorrow. Remember, it's okay to feel whatever you're feeling.",
+            "Grief is a process. Please be kind to yourself during this time. Would you like to talk about what you've lost?"
+        ),
+        'self_esteem': (
+            "It sounds like you're struggling with how you see yourself. Please remember your worth is inherent, not based on external factors.",
+            "Self-esteem can be a tough battle. What makes you feel this way? I'm here to remind you of your strengths.",
+            "You are valuable and deserving. Let's try to focus on some of your positive qualities or past achievements.",
+            "Building self-esteem takes time and kindness to oneself. What's one small act of self-care you can do today that might make you feel a little better?",
+            "I hear you questioning your worth. Remember, every individual has unique strengths and qualities. What are some things you're good at?",
+            "It's important to be kind to yourself. How can you challenge a negative thought about yourself right now?"
+        ),
+        'sleep_issues': (
+            "Trouble sleeping can really impact how you feel and function. What's been keeping you awake?",
+            "Sleep is so important for mental well-being. Let's discuss some common tips for improving sleep hygiene, like a consistent schedule or winding down routines.",
+            "It sounds like you're not getting enough restful sleep. What does your routine look like before bed?",
+            "Lack of sleep can make everything feel harder. Are there any thoughts or worries that come up when you try to sleep?",
+            "I'm sorry sleep is being elusive. How many hours of sleep have you been getting on average?",
+            "Sometimes, stress can disrupt sleep. Is there anything on your mind that's making it hard to rest?"
+        ),
+        'coping_strategy': (
+            "It sounds like you're looking for ways to cope. What kind of strategies are you interested in? (e.g., relaxation, distraction, problem-solving)",
+            "I can offer some coping strategies. Would you like to try a deep breathing exercise, or perhaps discuss mindfulness?",
+            "Coping strategies are personal. What's one thing that has helped you feel a little better in the past?",
+            "Let's explore some tools to help you manage. Are you feeling overwhelmed and need to relax, or do you want to tackle a specific problem?",
+            "Would you like to learn a quick grounding technique to help with intense feelings?"
+        ),
+        'seeking_resources': (
+            "I can provide you with some mental health resources. What kind of support are you looking for? (e.g., crisis lines, therapy, self-help)",
+            "It's great you're looking for resources. What specific area of mental health are you interested in?",
+            "I can share information on professional support. Are you looking for therapy options, support groups, or something else?",
+            "I have a list of trusted resources. What type of help would be most useful for you right now?"
+        ),
+        'positive': (
+            "I'm so glad to hear some positivity in your message! What's been going well for you?",
+            "That sounds encouraging! It's great to hear you're feeling better. What made the difference?",
+            "I'm happy you're having a good moment. What's been helping you feel this way?",
+            "It's wonderful to hear some brightness in your message. Keep focusing on those positive things!",
+            "That's fantastic news! What's something that made you smile today?",
+            "That's awesome! What's the best part about feeling this way?",
+            "It's truly wonderful to hear you're doing well!"
+        ),
+        'neutral_inquiry': ( 
+            "Thank you for sharing. Can you elaborate a bit more on that?",
+            "I'm listening. What else is on your mind about this?",
+            "Okay, I hear you. What aspects of that would you like to explore further?",
+            "What do you mean by that? I'm here to understand better.",
+            "I'm here to help. What's the next thing you'd like to talk about?",
+            "I hear what you're saying. How does that make you feel?",
+            "Can you tell me more about that situation?"
+        ),
+        'uncertain': ( 
+            "I'm not quite sure how to help with that. Can you rephrase or tell me more specifically what's on your mind?",
+            "My understanding is limited. Could you tell me in different words what you're experiencing?",
+            "I'm here to support you. What are you hoping to talk about regarding that?",
+            "Sometimes it's hard to put feelings into words. What's the main thing you want to share right now?"
+        ),
+        'general_support': (
+            "I'm here to listen. Can you tell me more about how you're feeling?",
+            "Thank you for sharing with me. What's been on your mind lately?",
+            "I appreciate you opening up. How has your day been overall?",
+            "Your feelings matter. Would you like to tell me more about what's troubling you?",
+            "It sounds like you're going through something. I'm here to support you.",
+            "What's one thing you're hoping to get out of our conversation today?",
+            "Sometimes just talking can help. What's on your mind?"
+        ),
+        'affirmation': (
+            "That sounds really challenging, and it takes strength to talk about it.",
+            "I hear you, and your feelings are completely valid.",
+            "It's okay to feel that way.",
+            "Thank you for sharing that with me."
+        ),
+        'proactive_offer_support': (
+            "Is there anything specific you'd like to discuss further, or perhaps a coping strategy we could explore?",
+            "I'm here to help you process this. What feels most important to you right now?",
+            "Would you like to talk more about this, or maybe explore some resources that could help?",
+            "How would you like to proceed? I'm here for you."
+        ),
+        'gratitude': (
+            "You're welcome! I'm here to help.",
+            "Glad I could be of assistance!",
+            "No problem at all. My pleasure to support you.",
+            "Happy to help!"
+        ),
+        'how_are_you_question': (
+            "As an AI, I don't have feelings, but I'm functioning well and ready to support you. How can I help you today?",
+            "I don't experience emotions, but I'm here and fully operational to listen to you. What's on your mind?",
+            "Thank you for asking! I'm here to focus on your well-being. How are you doing?"
+        )
+    }
+
+    # Merged pools for the sentiment fallbacks
+    _negative_pool = (
+        supportive_responses['depression'] +
+        supportive_responses['anxiety'] +
+        supportive_responses['stress'] +
+        supportive_responses['general_support']
+    )
+    _uncertain_pool = supportive_responses['general_support'] + supportive_responses['uncertain']
+    # Every pool _next_response can draw from
+    _response_pools = {
+        **supportive_responses,
+        'negative_fallback': _negative_pool,
+        'uncertain_fallback': _uncertain_pool
+    }
+
+    crisis_keywords = (
+        'suicide', 'kill myself', 'end my life', 'hurt myself', 
+        'self-harm', 'no point living', 'want to die', 'suicidal',
+        'overdose', 'cut myself', 'jump off', 'end it all', 'die', 'ending it'
+    )
+
+    # --- Expanded and more nuanced keyword/phrase matching ---
+    # Categories are checked in this order; the first one with a hit wins
+    category_keywords = {
+        'coping_strategy': (
+            'cope', 'managing', 'deal with', 'strategies', 'techniques', 'help me coping',
+            'breathing exercises', 'mindfulness', 'grounding exercise', 'relax', 'calm down',
+            'what to do', 'how to handle'
+        ),
+        'seeking_resources': (
+            'resources', 'help me find', 'therapist', 'doctor', 'professional help', 'support groups',
+            'hotline', 'get help', 'counseling', 'therapy', 'psychologist', 'psychiatrist'
+        ),
+        'anxiety': (
+            'anxious', 'anxiety', 'worried', 'nervous', 'panic', 'fear', 'stressed out', 'overthinking',
+            'racing thoughts', 'feeling uneasy', 'panic attack', 'social anxiety',
+            'general anxiety disorder', 'GAD'
+        ),
+        'depression': (
+            'depressed', 'depression', 'sad', 'hopeless', 'empty', 'worthless', 'lonely', 'unmotivated',
+            'down', 'tired all the time', 'feeling low', "can't get out of bed", 'loss of interest',
+            'nothing matters', 'suicidal thoughts', 'major depression'
+        ),
+        'stress': (
+            'stressed', 'stress', 'overwhelmed', 'pressure', 'burden', 'busy', 'burnout', 'too much',
+            'exhausted', 'high demands'
+        ),
+        'loneliness': (
+            'lonely', 'alone', 'isolated', 'disconnected', 'no one to talk to', 'feel alone', 'solitary'
+        ),
+        'anger': (
+            'angry', 'frustrated', 'rage', 'mad', 'irritated', 'resentful', 'hate', 'dislike', 'annoy',
+            'pissed', 'furious', 'upset', 'feeling angry', 'makes me angry'
+        ),
+        'grief': (
+            'grief', 'lose', 'lost', 'death', 'mourn', 'bereaved', 'passed away', 'heartbroken', 'loss of'
+        ),
+        'self_esteem': (
+            'worthless', 'bad about myself', 'ugly', 'not good enough', 'insecure', 'hate myself',
+            'low confidence', 'self-doubt', 'not confident'
+        ),
+        'sleep_issues': (
+            'sleep', 'insomnia', 'awake', 'tired', "can't sleep", 'restless', 'no sleep', 'not sleeping',
+            'sleep problems'
+        ),
+        'gratitude': ('thank you', 'thanks', 'thx'), # For "thank you" etc.
+        'how_are_you_question': ('how are you', 'how do you do', 'how r u'), # For "how are you" etc.
+        'goodbye': ('bye', 'goodbye', 'see ya', 'later', 'talk soon', 'good night'),
+        'affirmation': ( # For short, empathetic acknowledgements
+            'I feel that', 'I hear you', 'I understand', "that's true", "you're right"
+        )
+    }
+
+    # Keywords that must end on a word boundary; the rest also match inflected
+    # forms such as 'overdosed', 'self-harming' or 'suicides'
+    crisis_whole_words = ('die', 'want to die')
+
+    _crisis_re = _build_crisis_re(crisis_keywords, crisis_whole_words)
+    _intent_order, _keyword_priority, _phrase_index = _build_intent_tables(category_keywords)
+    _how_are_you_index = _build_phrase_index(dict.fromkeys(category_keywords['how_are_you_question'], True))
+
+    # Private RNG plus per-pool buffers of pre-sampled responses, shared by all
+    # instances since views build a fresh chatbot for every request
+    _rng = random.Random()
+    _response_buffers = {}
+
     def __init__(self):
-        openai.api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        
-        self.crisis_keywords = [
-            'suicide', 'kill myself', 'end my life', 'hurt myself', 
-            'self-harm', 'no point living', 'want to die', 'suicidal',
-            'overdose', 'cut myself', 'jump off', 'end it all', 'die', 'ending it'
-        ]
-        
-        # --- Expanded and categorized responses with more variations ---
-        self.supportive_responses = {
-            'greeting': [
-                "Hello! I'm here to listen and support you. How are you genuinely feeling today?",
-                "Hi there! I'm glad you're here. What's on your mind? I'm ready to listen.",
-                "Welcome! I'm here to provide a safe, non-judgmental space for you to share. How can I help?",
-                "It's good to see you. How are things with you today?",
-                "Hi! I'm here to support you. What's been happening?",
-                "Hey! I'm glad you reached out. What's on your mind?",
-                "Hello! I'm your mental wellness companion. How can I assist you today?"
-            ],
-            'anxiety': [
-                "I understand anxiety can be incredibly overwhelming. Let's take this one step at a time. Can you tell me more about what's causing it?",
-                "Anxiety is a difficult feeling, but you're not alone. Would you like to explore some calming techniques like deep breathing or mindfulness?",
-                "Thank you for sharing that. Anxiety is very real, and your feelings are absolutely valid. What does it feel like for you right now?",
-                "It sounds like you're carrying a lot of worry. I'm here to listen without judgment. Is there anything specific on your mind that's triggering this?",
-                "Anxiety can feel paralyzing. What's one small thing we can focus on right now to help ease that feeling?",
-                "Feeling anxious is tough. How intense is your anxiety on a scale of 1 to 10 right now?",
-                "Anxiety often comes with a racing mind. Would you like to try a grounding exercise?"
-            ],
-            'depression': [
-                "I hear that you're going through a truly tough time. Your feelings are valid and important. I'm here for you.",
-                "Depression can make everything feel heavy and hopeless. I want you to know I'm here to listen without judgment.",
-                "It takes immense courage to reach out when you're feeling low. I'm glad you're here talking about how you feel. What's weighing on you today?",
-                "I can sense the pain in your words. Please know that it's okay to feel this way, and you don't have to carry it alone.",
-                "When depression hits, even small tasks can feel monumental. Just talking about it is a step forward. What's one thing that feels hardest right now?",
-                "It sounds like you're in a dark place. Please remember that feelings are temporary, and support is available.",
-                "I'm sorry to hear you're feeling so down. What's one small thing that might bring a tiny bit of comfort?"
-            ],
-            'stress': [
-                "Stress can be incredibly overwhelming. What's been weighing on your mind lately? Sometimes just talking helps to clear things up.",
-                "It sounds like you're dealing with a lot right now. I'm here to listen. What's contributing to your stress?",
-                "Stress affects us all differently. I'm here to listen to what you're going through. What strategies have you tried to manage it?",
-                "Feeling stressed is a common human experience. Let's explore what might help ease some of that pressure for you.",
-                "Taking on too much can lead to immense stress. What's one small burden you feel you could set down, even for a moment?",
-                "It sounds like you're under a lot of pressure. What's your biggest stressor today?"
-            ],
-            'loneliness': [
-                "I hear you expressing feelings of loneliness. That's a very challenging emotion to carry. Can you tell me more about what that feels like?",
-                "It sounds like you're feeling disconnected. Loneliness is a tough experience, and I want you to know you're not alone in feeling it.",
-                "Reaching out about loneliness is a brave step. Is there anything specific you miss, or any connections you're looking for?",
-                "Feeling lonely can be heavy. I'm here to offer companionship and a listening ear. What's on your mind about it?",
-                "Sometimes loneliness comes from feeling misunderstood. Do you want to talk about that?",
-                "I'm sorry you're feeling lonely. Is there anything you enjoy doing that might help you feel more connected, even if it's a small step?"
-            ],
-            'anger': [
-                "It sounds like you're experiencing a lot of anger right now. That's a powerful emotion. Can you tell me what triggered it?",
-                "Feeling angry is a natural human response sometimes. What's making you feel this way? I'm here to listen.",
-                "It takes courage to acknowledge anger. Let's talk about what's upsetting you.",
-                "Anger can be a sign that something needs attention. What do you feel is being threatened or violated?",
-                "I hear the frustration in your words. What would feel helpful for you to process this anger?",
-                "It sounds like you're feeling a strong sense of anger. I'm here to listen to that. What specifically is making you feel this way?",
-                "It's okay to feel angry. What is the core issue that's making you so upset?"
-            ],
-            'grief': [
-                "I'm so sorry to hear you're experiencing grief. That must be incredibly painful. I'm here to hold space for you.",
-                "Grief is a heavy burden, and it's unique to everyone. Please take your time, and know I'm here to listen to whatever you need to share.",
-                "It takes immense strength to navigate loss. There's no right or wrong way to grieve. What's on your heart right now?",
-                "I hear your sadness and loss. If you wish to talk about what you're going through, I am here.",
-                "It sounds like you're experiencing deep sorrow. Remember, it's okay to feel whatever you're feeling.",
-                "Grief is a process. Please be kind to yourself during this time. Would you like to talk about what you've lost?"
-            ],
-            'self_esteem': [
-                "It sounds like you're struggling with how you see yourself. Please remember your worth is inherent, not based on external factors.",
-                "Self-esteem can be a tough battle. What makes you feel this way? I'm here to remind you of your strengths.",
-                "You are valuable and deserving. Let's try to focus on some of your positive qualities or past achievements.",
-                "Building self-esteem takes time and kindness to oneself. What's one small act of self-care you can do today that might make you feel a little better?",
-                "I hear you questioning your worth. Remember, every individual has unique strengths and qualities. What are some things you're good at?",
-                "It's important to be kind to yourself. How can you challenge a negative thought about yourself right now?"
-            ],
-            'sleep_issues': [
-                "Trouble sleeping can really impact how you feel and function. What's been keeping you awake?",
-                "Sleep is so important for mental well-being. Let's discuss some common tips for improving sleep hygiene, like a consistent schedule or winding down routines.",
-                "It sounds like you're not getting enough restful sleep. What does your routine look like before bed?",
-                "Lack of sleep can make everything feel harder. Are there any thoughts or worries that come up when you try to sleep?",
-                "I'm sorry sleep is being elusive. How many hours of sleep have you been getting on average?",
-                "Sometimes, stress can disrupt sleep. Is there anything on your mind that's making it hard to rest?"
-            ],
-            'coping_strategy': [
-                "It sounds like you're looking for ways to cope. What kind of strategies are you interested in? (e.g., relaxation, distraction, problem-solving)",
-                "I can offer some coping strategies. Would you like to try a deep breathing exercise, or perhaps discuss mindfulness?",
-                "Coping strategies are personal. What's one thing that has helped you feel a little better in the past?",
-                "Let's explore some tools to help you manage. Are you feeling overwhelmed and need to relax, or do you want to tackle a specific problem?",
-                "Would you like to learn a quick grounding technique to help with intense feelings?"
-            ],
-            'seeking_resources': [
-                "I can provide you with some mental health resources. What kind of support are you looking for? (e.g., crisis lines, therapy, self-help)",
-                "It's great you're looking for resources. What specific area of mental health are you interested in?",
-                "I can share information on professional support. Are you looking for therapy options, support groups, or something else?",
-                "I have a list of trusted resources. What type of help would be most useful for you right now?"
-            ],
-            'positive': [
-                "I'm so glad to hear some positivity in your message! What's been going well for you?",
-                "That sounds encouraging! It's great to hear you're feeling better. What made the difference?",
-                "I'm happy you're having a good moment. What's been helping you feel this way?",
-                "It's wonderful to hear some brightness in your message. Keep focusing on those positive things!",
-                "That's fantastic news! What's something that made you smile today?",
-                "That's awesome! What's the best part about feeling this way?",
-                "It's truly wonderful to hear you're doing well!"
-            ],
-            'neutral_inquiry': [ 
-                "Thank you for sharing. Can you elaborate a bit more on that?",
-                "I'm listening. What else is on your mind about this?",
-                "Okay, I hear you. What aspects of that would you like to explore further?",
-                "What do you mean by that? I'm here to understand better.",
-                "I'm here to help. What's the next thing you'd like to talk about?",
-                "I hear what you're saying. How does that make you feel?",
-                "Can you tell me more about that situation?"
-            ],
-            'uncertain': [ 
-                "I'm not quite sure how to help with that. Can you rephrase or tell me more specifically what's on your mind?",
-                "My understanding is limited. Could you tell me in different words what you're experiencing?",
-                "I'm here to support you. What are you hoping to talk about regarding that?",
-                "Sometimes it's hard to put feelings into words. What's the main thing you want to share right now?"
-            ],
-            'general_support': [
-                "I'm here to listen. Can you tell me more about how you're feeling?",
-                "Thank you for sharing with me. What's been on your mind lately?",
-                "I appreciate you opening up. How has your day been overall?",
-                "Your feelings matter. Would you like to tell me more about what's troubling you?",
-                "It sounds like you're going through something. I'm here to support you.",
-                "What's one thing you're hoping to get out of our conversation today?",
-                "Sometimes just talking can help. What's on your mind?"
-            ],
-            'affirmation': [
-                "That sounds really challenging, and it takes strength to talk about it.",
-                "I hear you, and your feelings are completely valid.",
-                "It's okay to feel that way.",
-                "Thank you for sharing that with me."
-            ],
-            'proactive_offer_support': [
-                "Is there anything specific you'd like to discuss further, or perhaps a coping strategy we could explore?",
-                "I'm here to help you process this. What feels most important to you right now?",
-                "Would you like to talk more about this, or maybe explore some resources that could help?",
-                "How would you like to proceed? I'm here for you."
-            ],
-            'gratitude': [
-                "You're welcome! I'm here to help.",
-                "Glad I could be of assistance!",
-                "No problem at all. My pleasure to support you.",
-                "Happy to help!"
-            ],
-            'how_are_you_question': [
-                "As an AI, I don't have feelings, but I'm functioning well and ready to support you. How can I help you today?",
-                "I don't experience emotions, but I'm here and fully operational to listen to you. What's on your mind?",
-                "Thank you for asking! I'm here to focus on your well-being. How are you doing?"
-            ]
-        }
-        
-        # --- Expanded and more nuanced keyword/phrase matching ---
-        # Prioritize more specific, multi-word phrases first
-        self.category_patterns = {
-            'coping_strategy': [
-                r'\b(cope|managing|deal with|strategies|techniques|help me coping)\b',
-                r'\b(breathing exercises|mindfulness|grounding exercise|relax|calm down)\b',
-                r'\b(what to do|how to handle)\b'
-            ],
-            'seeking_resources': [
-                r'\b(resources|help me find|therapist|doctor|professional help|support groups|hotline|get help)\b',
-                r'\b(counseling|therapy|psychologist|psychiatrist)\b'
-            ],
-            'anxiety': [
-                r'\b(anxious|anxiety|worried|nervous|panic|fear|stressed out|overthinking|racing thoughts|feeling uneasy)\b',
-                r'\b(panic attack|social anxiety|general anxiety disorder|GAD)\b'
-            ],
-            'depression': [
-                r'\b(depressed|depression|sad|hopeless|empty|worthless|lonely|unmotivated|down|tired all the time|feeling low)\b',
-                r'\b(can\'t get out of bed|loss of interest|nothing matters|suicidal thoughts|major depression)\b'
-            ],
-            'stress': [
-                r'\b(stressed|stress|overwhelmed|pressure|burden|busy|burnout|too much|exhausted|high demands)\b'
-            ],
-            'loneliness': [
-                r'\b(lonely|alone|isolated|disconnected|no one to talk to|feel alone|solitary)\b'
-            ],
-            'anger': [
-                r'\b(angry|frustrated|rage|mad|irritated|resentful|hate|dislike|annoy|pissed|furious|upset)\b',
-                r'\b(feeling angry|makes me angry)\b'
-            ],
-            'grief': [
-                r'\b(grief|lose|lost|death|mourn|bereaved|passed away|heartbroken|loss of)\b'
-            ],
-            'self_esteem': [
-                r'\b(worthless|bad about myself|ugly|not good enough|insecure|hate myself|low confidence|self-doubt|not confident)\b'
-            ],
-            'sleep_issues': [
-                r'\b(sleep|insomnia|awake|tired|can\'t sleep|restless|no sleep|not sleeping|sleep problems)\b'
-            ],
-            'gratitude': [ # For "thank you" etc.
-                r'\b(thank you|thanks|thx)\b'
-            ],
-            'how_are_you_question': [ # For "how are you" etc.
-                r'\b(how are you|how do you do|how r u)\b'
-            ],
-            'goodbye': [
-                r'\b(bye|goodbye|see ya|later|talk soon|good night)\b'
-            ],
-            'affirmation': [ # For short, empathetic acknowledgements
-                r'\b(I feel that|I hear you|I understand|that\'s true|you\'re right)\b'
-            ]
-        }
-        
+        self.api_key = getattr(settings, 'OPENAI_API_KEY', None)
+        self._client = None # Overrides the shared client for this instance
+        self._async_client = None # Same, for the async path
+
         # State tracking for more contextual responses
         self.last_user_intent = None
         self.last_bot_intent = None
         self.turn_count = 0 # To track dialogue turns
 
-        self.lemmatizer = lemmatizer if NLTK_AVAILABLE else None
-        self.stop_words = stop_words if NLTK_AVAILABLE else None
-
     def _preprocess_message(self, message):
-        """Lowercase, remove punctuation, lemmatize, remove stopwords (if NLTK available)"""
-        message = message.lower()
-        message = re.sub(r'[^\w\s]', '', message) # Remove punctuation
-        tokens = message.split()
+        """Lowercase, remove punctuation, lemmatize, remove stopwords (if NLTK available
+        and the message is long or non-ASCII)"""
+        return ' '.join(self._preprocess_tokens(message))
+
+    def _preprocess_tokens(self, message, lowered=False):
+        """Token list behind _preprocess_message, for callers that need the tokens
+        (pass lowered=True if the message is already lowercase)"""
+        if not lowered:
+            message = message.lower()
+        tokens = message.translate(_PUNCT_TBL).split()
         
-        if NLTK_AVAILABLE:
-            if self.lemmatizer and self.stop_words:
-                tokens = [self.lemmatizer.lemmatize(word) for word in tokens]
-                tokens = [word for word in tokens if word not in self.stop_words]
+        # Short plain-ASCII turns ("thanks", "i feel anxious") match the keyword
+        # lists as typed, so only longer or non-ASCII messages go through NLTK
+        if len(message) < NLTK_MIN_MESSAGE_LENGTH and message.isascii():
+            return tokens
+
+        if _ensure_nltk():
+            # Drop stopwords first so they are never lemmatized
+            tokens = [_lemmatize(word) for word in tokens if word not in _stop_words]
         
-        return ' '.join(tokens)
+        return tokens
+
+    # Short chat turns ("thanks", "ok", "hi") repeat constantly, so the deterministic
+    # classification is memoized for all instances. Response selection stays random.
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _classify_intent(cls, processed_message):
+        """Return the highest-priority category with a keyword in the message, or None"""
+        tokens = processed_message.split()
+        keyword_priority = cls._keyword_priority
+        hits = [keyword_priority[token] for token in tokens if token in keyword_priority]
+        hits.extend(_phrase_hits(tokens, cls._phrase_index))
+        return cls._intent_order[min(hits)] if hits else None
 
     def detect_crisis(self, message):
         """Detect if message contains crisis-related content"""
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in self.crisis_keywords)
+        return self._crisis_re.search(message) is not None
 
-    def analyze_sentiment(self, message):
-        """Analyze sentiment of user message"""
-        try:
-            blob = TextBlob(message)
-            return blob.sentiment.polarity
-        except Exception as e:
-            logger.error(f"Sentiment analysis error for message '{message}': {e}")
-            return 0.0
+    def analyze_sentiment(self, message, lowered=False):
+        """Analyze sentiment of user message (AFINN valence, scaled to -1.0..1.0)"""
+        if not lowered:
+            message = message.lower()
+        return self.analyze_sentiment_tokens(message.translate(_PUNCT_TBL).split())
+
+    def analyze_sentiment_tokens(self, tokens):
+        """Sentiment of an already tokenized message (lowercased, punctuation stripped,
+        stopwords kept so negations count)"""
+        return _sentiment_score(tokens)
+
+    def analyze_sentiment_batch(self, messages):
+        """Sentiment of many messages in one call (same scores as analyze_sentiment)"""
+        punct_tbl = _PUNCT_TBL
+        return [_sentiment_score(message.lower().translate(punct_tbl).split()) for message in messages]
 
     def get_crisis_response(self):
         """Return crisis intervention response"""
@@ -306,36 +547,42 @@ Is there someone you trust who you could talk to or be with right now?""",
             'resources': ['crisis_hotline', 'emergency_services']
         }
 
-    def _get_rule_based_response(self, user_message, sentiment, conversation_history):
-        """Advanced rule-based response system"""
-        processed_message = self._preprocess_message(user_message)
+    def _next_response(self, pool):
+        """Random response from the named pool (refills its buffer when empty)"""
+        buffer = self._response_buffers.get(pool)
+        if buffer:
+            # Buffers are shared across threads, so another one may have taken
+            # the last item since the check
+            try:
+                return buffer.pop()
+            except IndexError:
+                pass
+        buffer = self._rng.choices(self._response_pools[pool], k=RESPONSE_BUFFER_SIZE)
+        response = buffer.pop()
+        self._response_buffers[pool] = buffer
+        return response
+
+    def _get_rule_based_response(self, processed_tokens, sentiment, conversation_history):
+        """Advanced rule-based response system (takes the output of _preprocess_tokens)"""
+        processed_message = ' '.join(processed_tokens)
         current_intent = None
         
         # 0. Handle "How are you?" type questions immediately
-        if any(re.search(pattern, processed_message) for pattern in self.category_patterns.get('how_are_you_question', [])):
+        if _phrase_hits(processed_tokens, self._how_are_you_index):
             current_intent = 'how_are_you_question'
             self.last_user_intent = current_intent
             self.last_bot_intent = 'how_are_you_question'
-            return random.choice(self.supportive_responses['how_are_you_question'])
-
-        # 1. Direct Pattern Matching (prioritized by order in dictionary for general intent)
-        # Iterate over patterns to find the best match
-        for category, patterns in self.category_patterns.items():
-            if category in ['how_are_you_question']: # Skip already handled
-                continue
-            for pattern in patterns:
-                if re.search(pattern, processed_message):
-                    current_intent = category
-                    break # Found a match, prioritize this one
-            if current_intent:
-                break
+            return self._next_response('how_are_you_question')
+
+        # 1. Direct Keyword Matching (prioritized by order in dictionary for general intent)
+        current_intent = self._classify_intent(processed_message)
         
         # --- Contextual Logic (using last_user_intent / last_bot_intent) ---
         response = None
 
         if self.last_bot_intent == 'coping_strategy' and current_intent in ['affirmation', 'positive', 'general_support']:
             # User acknowledged or reacted positively to a suggested strategy
-            response = random.choice([
+            response = self._rng.choice([
                 "That's great to hear! How does practicing that strategy feel for you?",
                 "I'm glad that resonates. Is there anything else on your mind today?",
                 "Wonderful. Remember, even small steps can make a difference."
@@ -346,7 +593,7 @@ Is there someone you trust who you could talk to or be with right now?""",
         
         elif self.last_bot_intent == 'seeking_resources' and current_intent in ['yes', 'affirmation', 'general_support']:
             # User confirmed they want resources after being offered
-            response = random.choice([
+            response = self._rng.choice([
                 "Okay, I can help with that. For immediate crisis support, remember 988 or Crisis Text Line (text HOME to 741741). For general support, consider NAMI or Mental Health America. Would you like direct links?",
                 "Great! I have information on therapy, support groups, and self-help resources. What are you looking for specifically?",
                 "Providing resources is important. Let me tell you about a few options: Therapy directories like Psychology Today, or online support communities like 7 Cups. Which sounds more helpful?"
@@ -357,26 +604,26 @@ Is there someone you trust who you could talk to or be with right now?""",
 
         elif self.last_user_intent == 'gratitude' and current_intent == 'gratitude':
             # Handle repeated thanks gracefully
-            response = random.choice(self.supportive_responses['gratitude'])
+            response = self._next_response('gratitude')
             self.last_user_intent = current_intent # Update intent
             self.last_bot_intent = 'gratitude' # Bot still thanks
             return response
         
         elif current_intent == 'gratitude': # If user says thank you
-            response = random.choice(self.supportive_responses['gratitude'])
+            response = self._next_response('gratitude')
             self.last_user_intent = current_intent
             self.last_bot_intent = 'gratitude'
             return response
         
         elif current_intent == 'goodbye': # If user says goodbye
-            response = random.choice(self.supportive_responses['goodbye'])
+            response = self._next_response('goodbye')
             self.last_user_intent = current_intent
             self.last_bot_intent = 'goodbye'
             return response
         
         # --- Main Intent-based Response (if no specific contextual rule applied) ---
         if current_intent:
-            response = random.choice(self.supportive_responses.get(current_intent, self.supportive_responses['general_support']))
+            response = self._next_response(current_intent if current_intent in self._response_pools else 'general_support')
             self.last_user_intent = current_intent # Store the recognized intent
             self.last_bot_intent = current_intent # Bot's response aligns with user intent
             return response
@@ -385,67 +632,108 @@ Is there someone you trust who you could talk to or be with right now?""",
         if sentiment < -0.4: 
             self.last_user_intent = 'negative_sentiment' # Track general sentiment intent
             self.last_bot_intent = 'general_support'
-            return random.choice(self.supportive_responses['depression'] + 
-                                 self.supportive_responses['anxiety'] + 
-                                 self.supportive_responses['stress'] +
-                                 self.supportive_responses['general_support'])
+            return self._next_response('negative_fallback')
         elif sentiment > 0.4: 
             self.last_user_intent = 'positive_sentiment'
             self.last_bot_intent = 'positive'
-            return random.choice(self.supportive_responses['positive'])
+            return self._next_response('positive')
         elif sentiment >= -0.2 and sentiment <= 0.2: # Neutral or slightly neutral
             self.last_user_intent = 'neutral_inquiry'
             self.last_bot_intent = 'neutral_inquiry'
-            return random.choice(self.supportive_responses['neutral_inquiry'])
+            return self._next_response('neutral_inquiry')
         
         # --- Ultimate Fallback (if nothing else matches) ---
         self.last_user_intent = 'uncertain'
         self.last_bot_intent = 'uncertain'
-        return random.choice(self.supportive_responses['general_support'] + self.supportive_responses['uncertain'])
+        return self._next_response('uncertain_fallback')
+
+
+    def _build_api_messages(self, user_message, conversation_history):
+        """System prompt + history + the new message, in chat completions format"""
+        messages_for_api = [
+            {
+                "role": "system",
+                "content": """You are a compassionate and empathetic mental health support chatbot. 
+                        Your primary goal is to listen, provide non-judgmental support, and encourage users to seek professional help when appropriate. 
+                        You MUST NOT provide medical diagnosis, direct treatment advice, or claim to be a licensed therapist.
+                        Focus on validating feelings, offering coping strategies, and suggesting reputable resources.
+                        Keep responses concise but helpful. Always prioritize safety and well-being.
+                        If the user expresses positive feelings, reinforce them.
+                        Maintain a warm, understanding, and encouraging tone."""
+            }
+        ]
+        
+        if conversation_history:
+            messages_for_api.extend(conversation_history)
+        
+        messages_for_api.append({"role": "user", "content": user_message})
+        return messages_for_api
+
+    def _reply_cache_key(self, messages_for_api):
+        """Cache key for the OpenAI reply to this exact prompt"""
+        payload = json.dumps([SYSTEM_PROMPT_VERSION, OPENAI_MODEL, messages_for_api], sort_keys=True)
+        return 'openai_reply:' + hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+    def _fallback(self, lower_msg, conversation_history, warning=None):
+        """Rule-based response dict for an already lowercased message"""
+        tokens = self._preprocess_tokens(lower_msg, lowered=True)
+        # Scored on the raw words: stopword removal would drop negations like "not"
+        sentiment = self.analyze_sentiment(lower_msg, lowered=True)
+        response = {
+            'message': self._get_rule_based_response(tokens, sentiment, conversation_history),
+            'is_crisis': False,
+            'sentiment': sentiment
+        }
+        if warning:
+            response['warning'] = warning
+        return response
 
+    def _error_response(self, lower_msg, error, sentiment=None):
+        """Generic reply for an unexpected error, reusing sentiment if already scored"""
+        if sentiment is None:
+            sentiment = self.analyze_sentiment(lower_msg, lowered=True)
+        return {
+            'message': "I'm here to listen. Can you tell me more about how you're feeling?",
+            'is_crisis': False,
+            'sentiment': sentiment,
+            'error': str(error)
+        }
 
     def generate_response(self, user_message, conversation_history=None):
-        """Generate appropriate response based on user input"""
+        """Generate appropriate response based on user input (synchronous; the views
+        use agenerate_response, this serves scripts and other sync callers)"""
         
         # Increment turn count (for potential future use, e.g., long-term memory)
         self.turn_count += 1
+        # Lowercased once, shared by tokenizing and sentiment below
+        lower_msg = user_message.lower()
 
-        if self.detect_crisis(user_message):
+        if self.detect_crisis(lower_msg):
             self.last_user_intent = 'crisis' # Set user intent
             return self.get_crisis_response()
         
+        sentiment = None
         try:
-            if openai.api_key:
+            if self.api_key:
                 logger.info("Using OpenAI API for response generation.")
-                messages_for_api = [
-                    {
-                        "role": "system",
-                        "content": """You are a compassionate and empathetic mental health support chatbot. 
-                        Your primary goal is to listen, provide non-judgmental support, and encourage users to seek professional help when appropriate. 
-                        You MUST NOT provide medical diagnosis, direct treatment advice, or claim to be a licensed therapist.
-                        Focus on validating feelings, offering coping strategies, and suggesting reputable resources.
-                        Keep responses concise but helpful. Always prioritize safety and well-being.
-                        If the user expresses positive feelings, reinforce them.
-                        Maintain a warm, understanding, and encouraging tone."""
-                    }
-                ]
-                
-                if conversation_history:
-                    for msg in conversation_history:
-                        messages_for_api.append(msg)
-                
-                messages_for_api.append({"role": "user", "content": user_message})
-
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo", 
-                    messages=messages_for_api,
-                    max_tokens=250, 
-                    temperature=0.7, 
-                    top_p=0.9 
-                )
-                
-                bot_response = response.choices[0].message.content.strip()
-                sentiment = self.analyze_sentiment(user_message) 
+                # Scored before the API call so the error path below can reuse it
+                sentiment = self.analyze_sentiment(lower_msg, lowered=True)
+                messages_for_api = self._build_api_messages(user_message, conversation_history)
+
+                cache_key = self._reply_cache_key(messages_for_api)
+                bot_response = cache.get(cache_key)
+                if bot_response is None:
+                    client = self._client or _openai_client(self.api_key)
+                    response = client.chat.completions.create(
+                        model=OPENAI_MODEL, 
+                        messages=messages_for_api,
+                        max_tokens=250, 
+                        temperature=0.7, 
+                        top_p=0.9 
+                    )
+                    
+                    bot_response = response.choices[0].message.content.strip()
+                    cache.set(cache_key, bot_response, OPENAI_REPLY_CACHE_TIMEOUT)
                 
                 # Update last intents even with OpenAI for consistency (if you switch back)
                 # This requires parsing OpenAI's response to infer intent, which is hard.
@@ -460,39 +748,98 @@ Is there someone you trust who you could talk to or be with right now?""",
                 }
             else:
                 logger.warning("OPENAI_API_KEY not found. Falling back to rule-based responses.")
-                sentiment = self.analyze_sentiment(user_message)
-                bot_response = self._get_rule_based_response(user_message, sentiment, conversation_history)
-                return {
-                    'message': bot_response,
-                    'is_crisis': False,
-                    'sentiment': sentiment
-                }
+                return self._fallback(lower_msg, conversation_history)
         except openai.AuthenticationError: 
             logger.error("OpenAI API Authentication Error: Your API key is invalid, revoked, or expired. Falling back to rule-based.")
-            sentiment = self.analyze_sentiment(user_message)
-            bot_response = self._get_rule_based_response(user_message, sentiment, conversation_history)
-            return {
-                'message': bot_response,
-                'is_crisis': False,
-                'sentiment': sentiment,
-                'warning': "API key invalid, using fallback responses."
-            }
+            return self._fallback(lower_msg, conversation_history, "API key invalid, using fallback responses.")
         except openai.APIError as e: 
             logger.error(f"OpenAI API Error: {e}. Falling back to rule-based.")
-            sentiment = self.analyze_message(user_message) # Corrected typo from analyze_sentiment
-            bot_response = self._get_rule_based_response(user_message, sentiment, conversation_history)
-            return {
-                'message': bot_response,
-                'is_crisis': False,
-                'sentiment': sentiment,
-                'warning': "API error, using fallback responses."
-            }
+            return self._fallback(lower_msg, conversation_history, "API error, using fallback responses.")
         except Exception as e:
             logger.error(f"Unexpected error in generate_response: {e}", exc_info=True) 
-            sentiment = self.analyze_sentiment(user_message) 
-            return {
-                'message': "I'm here to listen. Can you tell me more about how you're feeling?",
-                'is_crisis': False,
-                'sentiment': sentiment,
-                'error': str(e)
-            }
\ No newline at end of file
+            return self._error_response(lower_msg, e, sentiment)
+
+    async def agenerate_response(self, user_message, conversation_history=None):
+        """Async, streaming variant of generate_response.
+
+        Yields the reply text in chunks as they arrive from OpenAI, then, as the
+        last item, the same dict generate_response returns. Crisis, cached and
+        rule-based replies are yielded as a single chunk.
+        """
+        self.turn_count += 1
+        lower_msg = user_message.lower()
+
+        if self.detect_crisis(lower_msg):
+            self.last_user_intent = 'crisis'
+            response = self.get_crisis_response()
+            yield response['message']
+            yield response
+            return
+
+        warning = None
+        if self.api_key:
+            messages_for_api = self._build_api_messages(user_message, conversation_history)
+            cache_key = self._reply_cache_key(messages_for_api)
+            parts = []
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                parts.append(cached)
+                yield cached
+            else:
+                try:
+                    client = self._async_client or _async_openai_client(self.api_key)
+                    stream = await client.chat.completions.create(
+                        model=OPENAI_MODEL,
+                        messages=messages_for_api,
+                        max_tokens=250,
+                        temperature=0.7,
+                        top_p=0.9,
+                        stream=True
+                    )
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            # Nothing is sent before the first non-whitespace text,
+                            # matching the strip() of the non-streaming reply
+                            if not parts:
+                                delta = delta.lstrip()
+                                if not delta:
+                                    continue
+                            parts.append(delta)
+                            yield delta
+                except openai.AuthenticationError:
+                    logger.error("OpenAI API Authentication Error: Your API key is invalid, revoked, or expired. Falling back to rule-based.")
+                    warning = "API key invalid, using fallback responses."
+                except openai.APIError as e:
+                    logger.error(f"OpenAI API Error: {e}. Falling back to rule-based.")
+                    warning = "API error, using fallback responses."
+                else:
+                    if parts:
+                        await cache.aset(cache_key, ''.join(parts).rstrip(), OPENAI_REPLY_CACHE_TIMEOUT)
+
+            if parts:
+                # A stream that breaks part-way keeps what was already sent
+                self.last_user_intent = None
+                self.last_bot_intent = None
+                yield {
+                    'message': ''.join(parts).rstrip(),
+                    'is_crisis': False,
+                    'sentiment': self.analyze_sentiment(lower_msg, lowered=True)
+                }
+                return
+        else:
+            logger.warning("OPENAI_API_KEY not found. Falling back to rule-based responses.")
+
+        response = self._fallback(lower_msg, conversation_history, warning)
+        yield response['message']
+        yield response
+
+    async def agenerate_reply(self, user_message, conversation_history=None):
+        """Async counterpart of generate_response: the whole reply, without streaming"""
+        try:
+            async for chunk in self.agenerate_response(user_message, conversation_history):
+                response = chunk
+            return response
+        except Exception as e:
+            logger.error(f"Unexpected error in agenerate_reply: {e}", exc_info=True)
+            return self._error_response(user_message.lower(), e)
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from chatbot.models import SupportResource
+from chatbot.utils import invalidate_support_resource_cache
 
 class Command(BaseCommand):
     help = 'Populate database with mental health support resources'
@@ -72,22 +73,28 @@ class Command(BaseCommand):
             }
         ]
 
-        created_count = 0
+        # One query for what already exists, one INSERT for the rest
+        existing_titles = set(SupportResource.objects.filter(
+            title__in=[resource_data['title'] for resource_data in resources]
+        ).values_list('title', flat=True))
+
+        new_resources = []
         for resource_data in resources:
-            resource, created = SupportResource.objects.get_or_create(
-                title=resource_data['title'],
-                defaults=resource_data
-            )
-            if created:
-                created_count += 1
+            if resource_data['title'] in existing_titles:
                 self.stdout.write(
-                    self.style.SUCCESS(f'Created resource: {resource.title}')
+                    self.style.WARNING(f'Resource already exists: {resource_data["title"]}')
                 )
             else:
-                self.stdout.write(
-                    self.style.WARNING(f'Resource already exists: {resource.title}')
-                )
+                new_resources.append(SupportResource(**resource_data))
+        SupportResource.objects.bulk_create(new_resources)
+        for resource in new_resources:
+            self.stdout.write(
+                self.style.SUCCESS(f'Created resource: {resource.title}')
+            )
+        # bulk_create sends no post_save signals
+        if new_resources:
+            invalidate_support_resource_cache()
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully created {created_count} new resources')
+            self.style.SUCCESS(f'Successfully created {len(new_resources)} new resources')
         )
\ No newline at end of file
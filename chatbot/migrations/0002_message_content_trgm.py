@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+# Admin search on Message.content runs `UPPER(content) LIKE UPPER('%term%')`,
+# which a trigram GIN index on the same expression can serve on PostgreSQL.
+# Other backends (SQLite in development) have no pg_trgm, so they are skipped.
+
+def create_content_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS msg_content_trgm '
+        'ON chatbot_message USING gin (UPPER(content) gin_trgm_ops)'
+    )
+
+
+def drop_content_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS msg_content_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_content_trgm_index, drop_content_trgm_index),
+    ]
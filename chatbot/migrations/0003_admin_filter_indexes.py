@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_message_content_trgm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['-started_at'], name='chatbot_con_started_63ce4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['is_active', '-started_at'], name='chatbot_con_is_acti_f5985e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['timestamp'], name='chatbot_mes_timesta_59b6f7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['message_type', 'timestamp'], name='chatbot_mes_message_bcb627_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['-created_at'], name='chatbot_moo_created_606394_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['user', '-created_at'], name='chatbot_moo_user_id_30933d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['mood_level'], name='chatbot_moo_mood_le_182e4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportresource',
+            index=models.Index(fields=['-created_at'], name='chatbot_sup_created_828cc0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportresource',
+            index=models.Index(fields=['category', 'is_emergency'], name='chatbot_sup_categor_f58c1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-created_at'], name='chatbot_use_created_09f453_idx'),
+        ),
+    ]
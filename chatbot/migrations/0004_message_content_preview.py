@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='content_preview',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Left('content', 50), output_field=models.CharField(max_length=50), verbose_name='Content Preview'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-15 17:47
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# On PostgreSQL, Message.search_vector is filled by a trigger from the message
+# content and the owning conversation's username, and served by a GIN index.
+# It replaces the trigram index from 0002, which admin search no longer uses.
+# Other backends (SQLite in development) keep the column empty and the admin
+# falls back to the regular icontains search.
+
+def create_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("""
+        CREATE OR REPLACE FUNCTION chatbot_message_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                to_tsvector('pg_catalog.english', coalesce(NEW.content, '')) ||
+                to_tsvector('pg_catalog.simple', coalesce((
+                    SELECT u.username
+                    FROM chatbot_conversation c
+                    JOIN auth_user u ON u.id = c.user_id
+                    WHERE c.id = NEW.conversation_id
+                ), ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER chatbot_message_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF content, conversation_id ON chatbot_message
+        FOR EACH ROW EXECUTE FUNCTION chatbot_message_search_vector_update()
+    """)
+    # Backfill existing rows through the trigger
+    schema_editor.execute('UPDATE chatbot_message SET content = content')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS msg_search_vector_gin '
+        'ON chatbot_message USING gin (search_vector)'
+    )
+    schema_editor.execute('DROP INDEX IF EXISTS msg_content_trgm')
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS msg_content_trgm '
+        'ON chatbot_message USING gin (UPPER(content) gin_trgm_ops)'
+    )
+    schema_editor.execute('DROP INDEX IF EXISTS msg_search_vector_gin')
+    schema_editor.execute('DROP TRIGGER IF EXISTS chatbot_message_search_vector_trigger ON chatbot_message')
+    schema_editor.execute('DROP FUNCTION IF EXISTS chatbot_message_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0004_message_content_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
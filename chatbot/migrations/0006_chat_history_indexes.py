@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-15 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0005_message_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-timestamp'], name='chatbot_mes_convers_0cc130_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['session_id', '-created_at'], name='chatbot_moo_session_cf4ef5_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
+from django.db.models.functions import Left
 from django.utils import timezone
 import uuid
 
@@ -10,6 +12,11 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     privacy_accepted = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+    
     def __str__(self):
         return f"{self.user.username if self.user else 'Anonymous'}'s Profile"
 
@@ -22,6 +29,10 @@ class Conversation(models.Model):
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at']),
+            models.Index(fields=['is_active', '-started_at']),
+        ]
     
     def __str__(self):
         return f"Conversation {str(self.session_id)[:8]}"
@@ -38,11 +49,28 @@ class Message(models.Model):
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     sentiment_score = models.FloatField(null=True, blank=True)
+    # Stored by the database so list views never have to read the full content
+    content_preview = models.GeneratedField(
+        expression=Left('content', 50),
+        output_field=models.CharField(max_length=50),
+        db_persist=True,
+        verbose_name='Content Preview'
+    )
+    # Maintained by a PostgreSQL trigger from content and the conversation's username
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['message_type', 'timestamp']),
+            models.Index(fields=['conversation', '-timestamp']),
+        ]
     
     def __str__(self):
+        # Admin list pages defer content and load only the stored preview
+        if 'content' in self.get_deferred_fields():
+            return f"{self.message_type}: {self.content_preview}..."
         return f"{self.message_type}: {self.content[:50]}..."
 
 class MoodEntry(models.Model):
@@ -61,6 +89,14 @@ class MoodEntry(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['session_id', '-created_at']),
+            models.Index(fields=['mood_level']),
+        ]
+    
     def __str__(self):
         return f"Mood: {self.mood_level} - {self.created_at.strftime('%Y-%m-%d')}"
 
@@ -73,5 +109,11 @@ class SupportResource(models.Model):
     is_emergency = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['category', 'is_emergency']),
+        ]
+    
     def __str__(self):
         return self.title
\ No newline at end of file
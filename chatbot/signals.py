@@ -1,7 +1,8 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile, Conversation, Message
+from .models import UserProfile, Conversation, Message, SupportResource
+from .utils import invalidate_support_resource_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,4 +31,10 @@ def log_message_created(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Conversation)
 def log_conversation_deleted(sender, instance, **kwargs):
     """Log when conversations are deleted"""
-    logger.info(f"Conversation deleted: {instance.session_id}")
\ No newline at end of file
+    logger.info(f"Conversation deleted: {instance.session_id}")
+
+@receiver(post_save, sender=SupportResource)
+@receiver(post_delete, sender=SupportResource)
+def support_resource_changed(sender, **kwargs):
+    """Refresh cached resource lists when a resource changes"""
+    invalidate_support_resource_cache()
\ No newline at end of file
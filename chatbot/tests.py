@@ -1,19 +1,29 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.contrib.admin.models import LogEntry
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 from django.utils import timezone
 from .models import Conversation, Message, MoodEntry, SupportResource
 from .ai_processor import MentalHealthChatbot
 import json
+from io import StringIO
+import openai
+from types import SimpleNamespace
+from unittest import mock
 
 class ModelTests(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.conversation = Conversation.objects.create(user=self.user)
+        cls.conversation = Conversation.objects.create(user=cls.user)
 
     def test_conversation_creation(self):
         """Test conversation model creation"""
@@ -43,19 +53,30 @@ class ModelTests(TestCase):
         self.assertEqual(mood.user, self.user)
 
 class ViewTests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             password='testpass123'
         )
 
+    def setUp(self):
+        self.client = Client()
+
     def test_index_view(self):
         """Test index page loads"""
         response = self.client.get(reverse('index'))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Mental Health Support')
 
+    def test_index_view_conditional_get(self):
+        """Test a repeat load of an unchanged page gets a 304"""
+        response = self.client.get(reverse('index'))
+        self.assertTrue(response.has_header('ETag'))
+        response = self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
     def test_chat_view(self):
         """Test chat page loads"""
         response = self.client.get(reverse('chat'))
@@ -73,6 +94,88 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         response_data = json.loads(response.content)
         self.assertIn('bot_response', response_data)
+        bot_msg = Message.objects.get(message_type='bot')
+        self.assertEqual(response_data['message_id'], bot_msg.id)
+        self.assertEqual(bot_msg.content, response_data['bot_response'])
+        self.assertLess(Message.objects.get(message_type='user').id, bot_msg.id)
+
+    def test_conversation_reused_across_requests(self):
+        """Test the session's conversation is reused, and recreated if it is gone"""
+        self.client.get(reverse('chat'))
+        for text in ['Hello', 'I feel stressed']:
+            self.client.post(
+                reverse('process_message'),
+                data=json.dumps({'message': text}),
+                content_type='application/json'
+            )
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(Message.objects.count(), 4)
+
+        Conversation.objects.all().delete()
+        self.client.get(reverse('chat'))
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(self.client.session['conversation_id'], str(Conversation.objects.get().session_id))
+
+    def test_clear_chat(self):
+        """Test clearing the chat ends the conversation and starts a new session"""
+        self.client.get(reverse('chat'))
+        conversation = Conversation.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('clear_chat'))
+        self.assertEqual(len([q for q in queries.captured_queries if 'chatbot_conversation' in q['sql']]), 1)
+        self.assertRedirects(response, reverse('chat'), fetch_redirect_response=False)
+
+        conversation.refresh_from_db()
+        self.assertFalse(conversation.is_active)
+        self.assertIsNotNone(conversation.ended_at)
+        self.assertNotIn('conversation_id', self.client.session)
+
+    def test_malformed_session_conversation_id(self):
+        """Test a malformed conversation_id in the session is replaced, not a server error"""
+        session = self.client.session
+        session['conversation_id'] = 'not-a-uuid'
+        session.save()
+
+        self.assertEqual(self.client.get(reverse('chat')).status_code, 200)
+        self.assertEqual(self.client.session['conversation_id'], str(Conversation.objects.get().session_id))
+
+    def test_session_saved_only_when_conversation_created(self):
+        """Test revisiting the chat does not write the session again"""
+        self.client.get(reverse('chat'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('chat'))
+        session_writes = [
+            q for q in queries.captured_queries
+            if 'django_session' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(session_writes, [])
+
+    def test_history_excludes_current_message(self):
+        """Test the chatbot gets earlier turns as history, not the new message twice"""
+        for text in ['First message', 'Second message']:
+            with mock.patch.object(MentalHealthChatbot, 'agenerate_reply', autospec=True,
+                                   side_effect=MentalHealthChatbot.agenerate_reply) as generate:
+                self.client.post(
+                    reverse('process_message'),
+                    data=json.dumps({'message': text}),
+                    content_type='application/json'
+                )
+        history = generate.call_args.args[2]
+        self.assertEqual([turn['role'] for turn in history], ['user', 'assistant'])
+        self.assertEqual(history[0]['content'], 'First message')
+
+    async def test_process_message_stream(self):
+        """Test streaming message processing"""
+        response = await self.async_client.post(
+            reverse('process_message_stream'),
+            data=json.dumps({'message': 'Hello, I need help'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) async for line in response.streaming_content]
+        self.assertIn('delta', lines[0])
+        self.assertEqual(lines[-1]['bot_response'], ''.join(line.get('delta', '') for line in lines))
+        self.assertEqual(await Message.objects.acount(), 2)
 
     def test_mood_tracker_view(self):
         """Test mood tracker page"""
@@ -80,6 +183,44 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Mood Tracker')
 
+    def test_mood_tracker_lists_recent_moods(self):
+        """Test the logged-in mood list renders the user's entries"""
+        MoodEntry.objects.create(user=self.user, mood_level=4, notes='Went for a walk')
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('mood_tracker'))
+        self.assertContains(response, 'Went for a walk')
+        self.assertEqual(len([q for q in queries.captured_queries if 'chatbot_moodentry' in q['sql']]), 1)
+
+    def test_delete_mood_entry(self):
+        """Test a mood entry is deleted once and only by its owner"""
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        mood = MoodEntry.objects.create(user=other, mood_level=2)
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('delete_mood_entry', args=[mood.id])
+
+        self.assertEqual(self.client.post(url).status_code, 404)
+        mood.user = self.user
+        mood.save()
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url).json()['status'], 'success')
+        self.assertFalse(MoodEntry.objects.filter(id=mood.id).exists())
+        self.assertEqual(self.client.post(url).json()['status'], 'not_found')
+
+    def test_resources_view_splits_resources(self):
+        """Test the resources page lists emergency and general resources"""
+        SupportResource.objects.create(title='Crisis Line', description='24/7', category='crisis', is_emergency=True)
+        SupportResource.objects.create(title='Peer Group', description='Weekly', category='support')
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(reverse('resources'))
+        self.assertEqual([r['title'] for r in response.context['emergency_resources']], ['Crisis Line'])
+        self.assertEqual([r['title'] for r in response.context['general_resources']], ['Peer Group'])
+
+        SupportResource.objects.filter(title='Peer Group').delete()
+        response = self.client.get(reverse('resources'))
+        self.assertEqual(response.context['general_resources'], [])
+
     def test_resources_view(self):
         """Test resources page"""
         response = self.client.get(reverse('resources'))
@@ -87,8 +228,15 @@ class ViewTests(TestCase):
         self.assertContains(response, 'Mental Health Resources')
 
 class AIProcessorTests(TestCase):
-    def setUp(self):
-        self.chatbot = MentalHealthChatbot()
+    @classmethod
+    def setUpTestData(cls):
+        # Each test gets its own deep copy, so dialogue state does not leak
+        cls.chatbot = MentalHealthChatbot()
+
+    @staticmethod
+    def _fake_client(create):
+        """Stand-in OpenAI client whose chat.completions.create is the given callable"""
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
 
     def test_crisis_detection(self):
         """Test crisis keyword detection"""
@@ -98,6 +246,14 @@ class AIProcessorTests(TestCase):
         normal_message = "I'm feeling sad today"
         self.assertFalse(self.chatbot.detect_crisis(normal_message))
 
+        self.assertFalse(self.chatbot.detect_crisis("I started a new diet"))
+        self.assertFalse(self.chatbot.detect_crisis("I studied all night"))
+
+        # Inflected forms of crisis keywords still count
+        self.assertTrue(self.chatbot.detect_crisis("I overdosed last night"))
+        self.assertTrue(self.chatbot.detect_crisis("I self-harmed again"))
+        self.assertTrue(self.chatbot.detect_crisis("thinking about suicides"))
+
     def test_sentiment_analysis(self):
         """Test sentiment analysis"""
         positive_message = "I'm feeling great and happy!"
@@ -108,6 +264,30 @@ class AIProcessorTests(TestCase):
         sentiment = self.chatbot.analyze_sentiment(negative_message)
         self.assertLess(sentiment, 0)
 
+    def test_sentiment_negation_and_phrases(self):
+        """Test negated positives and multi-word lexicon entries score negative"""
+        for message in ["I am not happy", "I'm not good", "nothing feels good anymore",
+                        "I am fed up", "I can't stand this"]:
+            with self.subTest(message=message):
+                self.assertLess(self.chatbot.analyze_sentiment(message), 0)
+
+        self.assertGreater(self.chatbot.analyze_sentiment("not bad at all"), 0)
+
+    def test_sentiment_batch_matches_single(self):
+        """Test batch sentiment gives the same scores as one-at-a-time"""
+        messages = ["I'm feeling great and happy!", "I'm feeling terrible and sad", "", "Okay.", "I'm not good"]
+        self.assertEqual(
+            self.chatbot.analyze_sentiment_batch(messages),
+            [self.chatbot.analyze_sentiment(message) for message in messages]
+        )
+
+    def test_next_response_draws_from_pool(self):
+        """Test buffered response selection stays within the pool and refills"""
+        pool = self.chatbot.supportive_responses['gratitude']
+        picks = [self.chatbot._next_response('gratitude') for _ in range(40)]
+        self.assertTrue(set(picks) <= set(pool))
+        self.assertGreater(len(set(picks)), 1)
+
     def test_response_generation(self):
         """Test response generation"""
         message = "Hello, I need someone to talk to"
@@ -125,6 +305,68 @@ class AIProcessorTests(TestCase):
         self.assertTrue(response['is_crisis'])
         self.assertIn('988', response['message'])
 
+    def test_openai_reply_cached(self):
+        """Test a repeated prompt is answered from the cache"""
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=' Cached reply '))])
+
+        cache.clear()
+        self.chatbot.api_key = 'test-key'
+        self.chatbot._client = self._fake_client(create)
+        first = self.chatbot.generate_response("What can I do about anxiety?")
+        second = self.chatbot.generate_response("What can I do about anxiety?")
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first['message'], 'Cached reply')
+        self.assertEqual(second['message'], 'Cached reply')
+        self.assertIn('sentiment', second)
+
+    def test_api_error_falls_back_to_rules(self):
+        """Test an OpenAI API error gives a rule-based reply with a warning"""
+        def create(**kwargs):
+            raise openai.APIError('Service unavailable', None, body=None)
+
+        self.chatbot.api_key = 'test-key'
+        self.chatbot._client = self._fake_client(create)
+        response = self.chatbot.generate_response("I feel so anxious about tomorrow")
+
+        self.assertIn(response['message'], self.chatbot.supportive_responses['anxiety'])
+        self.assertEqual(response['warning'], "API error, using fallback responses.")
+        self.assertNotIn('error', response)
+
+    def test_unexpected_error_scores_sentiment_once(self):
+        """Test an unexpected error reuses the sentiment scored before the API call"""
+        def create(**kwargs):
+            raise ValueError('boom')
+
+        self.chatbot.api_key = 'test-key'
+        self.chatbot._client = self._fake_client(create)
+        with mock.patch.object(self.chatbot, 'analyze_sentiment', wraps=self.chatbot.analyze_sentiment) as analyze:
+            response = self.chatbot.generate_response("I feel sad today")
+
+        self.assertEqual(analyze.call_count, 1)
+        self.assertLess(response['sentiment'], 0)
+        self.assertEqual(response['error'], 'boom')
+
+    async def test_async_reply_matches_streamed_reply(self):
+        """Test agenerate_reply returns the final streamed dict, or the error reply"""
+        response = await self.chatbot.agenerate_reply("I want to end my life")
+        self.assertTrue(response['is_crisis'])
+
+        with mock.patch.object(self.chatbot, 'agenerate_response', side_effect=ValueError('boom')):
+            response = await self.chatbot.agenerate_reply("I feel sad today")
+        self.assertEqual(response['error'], 'boom')
+        self.assertFalse(response['is_crisis'])
+
+    async def test_streamed_crisis_response(self):
+        """Test the async generator yields the reply, then the response dict"""
+        chunks = [chunk async for chunk in self.chatbot.agenerate_response("I want to end my life")]
+        self.assertTrue(chunks[-1]['is_crisis'])
+        self.assertEqual(chunks[0], chunks[-1]['message'])
+
 class FormTests(TestCase):
     def test_mood_entry_form_valid(self):
         """Test valid mood entry form"""
@@ -149,9 +391,8 @@ class FormTests(TestCase):
         self.assertFalse(form.is_valid())
 
 class IntegrationTests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        
+    @classmethod
+    def setUpTestData(cls):
         # Create test resources
         SupportResource.objects.create(
             title='Test Crisis Line',
@@ -195,6 +436,25 @@ class IntegrationTests(TestCase):
         self.assertTrue(response_data['is_crisis'])
         self.assertGreater(len(response_data['support_resources']), 0)
 
+    def test_crisis_resources_cached_until_changed(self):
+        """Test emergency resources are served from cache and refreshed on change"""
+        def crisis_resources():
+            response = self.client.post(
+                reverse('process_message'),
+                data=json.dumps({'message': 'I want to hurt myself'}),
+                content_type='application/json'
+            )
+            return [resource['title'] for resource in json.loads(response.content)['support_resources']]
+
+        self.assertEqual(crisis_resources(), ['Test Crisis Line'])
+        SupportResource.objects.filter(title='Test Crisis Line').update(title='Renamed')
+        self.assertEqual(crisis_resources(), ['Test Crisis Line'])
+
+        SupportResource.objects.create(
+            title='Second Line', description='More support', category='crisis', is_emergency=True
+        )
+        self.assertEqual(sorted(crisis_resources()), ['Renamed', 'Second Line'])
+
     def test_mood_tracking_workflow(self):
         """Test mood tracking workflow"""
         # Submit mood
@@ -208,4 +468,95 @@ class IntegrationTests(TestCase):
         # Check mood was saved
         mood_entries = MoodEntry.objects.all()
         self.assertEqual(mood_entries.count(), 1)
-        self.assertEqual(mood_entries.first().mood_level, 4)
\ No newline at end of file
+        self.assertEqual(mood_entries.first().mood_level, 4)
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        conversation = Conversation.objects.create(user=cls.admin_user)
+        Message.objects.create(
+            conversation=conversation,
+            message_type='user',
+            content='A fairly long message that should be cut down in the admin preview column'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username='admin', password='adminpass123')
+
+    def test_changelists_load(self):
+        """Test every chatbot admin changelist and add form renders"""
+        for model in ['userprofile', 'conversation', 'message', 'moodentry', 'supportresource']:
+            response = self.client.get(reverse(f'admin:chatbot_{model}_changelist'))
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(reverse(f'admin:chatbot_{model}_add'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_message_content_preview(self):
+        """Test message changelist shows the stored content preview"""
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('admin:chatbot_message_changelist'))
+        self.assertContains(response, 'A fairly long message that should be cut down in t<')
+        self.assertNotContains(response, 'admin preview column')
+
+    def test_support_resource_changelist_refreshes_after_save(self):
+        """Test cached resource changelist is invalidated by admin edits"""
+        resource = SupportResource.objects.create(
+            title='Original Title',
+            description='Test support',
+            category='support'
+        )
+        changelist_url = reverse('admin:chatbot_supportresource_changelist')
+        self.assertContains(self.client.get(changelist_url), 'Original Title')
+
+        self.client.post(
+            reverse('admin:chatbot_supportresource_change', args=[resource.id]),
+            {'title': 'Updated Title', 'description': 'Test support', 'url': '',
+             'phone_number': '', 'category': 'support'}
+        )
+        self.client.get(changelist_url)  # consumes the "changed successfully" message
+        self.assertContains(self.client.get(changelist_url), 'Updated Title')
+
+    def test_mark_inactive_action(self):
+        """Test bulk action closes the selected conversations"""
+        conversation = Conversation.objects.get()
+        self.client.post(reverse('admin:chatbot_conversation_changelist'), {
+            'action': 'mark_inactive',
+            '_selected_action': [conversation.id],
+        })
+        conversation.refresh_from_db()
+        self.assertFalse(conversation.is_active)
+        self.assertIsNotNone(conversation.ended_at)
+        self.assertTrue(LogEntry.objects.filter(object_id=str(conversation.id)).exists())
+
+    def test_recalculate_sentiment_action(self):
+        """Test bulk action fills in message sentiment scores"""
+        message = Message.objects.get()
+        self.client.post(reverse('admin:chatbot_message_changelist'), {
+            'action': 'recalculate_sentiment',
+            '_selected_action': [message.id],
+        })
+        message.refresh_from_db()
+        self.assertIsNotNone(message.sentiment_score)
+
+    def test_conversation_message_count(self):
+        """Test conversation changelist shows annotated message counts"""
+        response = self.client.get(reverse('admin:chatbot_conversation_changelist'))
+        self.assertContains(response, '<td class="field-message_count">1</td>', html=True)
+
+class CommandTests(TestCase):
+    def test_populate_resources_is_idempotent(self):
+        """Test populate_resources creates each resource once"""
+        out = StringIO()
+        with self.assertNumQueries(2):
+            call_command('populate_resources', stdout=out)
+        self.assertIn('Successfully created 8 new resources', out.getvalue())
+
+        call_command('populate_resources', stdout=out)
+        self.assertEqual(SupportResource.objects.count(), 8)
+        self.assertIn('Successfully created 0 new resources', out.getvalue())
@@ -5,6 +5,7 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('chat/', views.chat_view, name='chat'),
     path('process-message/', views.process_message, name='process_message'),
+    path('process-message/stream/', views.process_message_stream, name='process_message_stream'),
     path('mood-tracker/', views.mood_tracker, name='mood_tracker'),
     path('mood-tracker/delete/<int:mood_id>/', views.delete_mood_entry, name='delete_mood_entry'),
     path('resources/', views.resources, name='resources'),
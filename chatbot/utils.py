@@ -2,12 +2,23 @@ import re
 import logging
 from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
-from .models import Conversation, Message
+from .models import Conversation, Message, SupportResource
 
 logger = logging.getLogger(__name__)
 
+# Support resources rarely change (the populate command and the admin), so the
+# lists served to users are cached until a resource is saved or deleted
+EMERGENCY_RESOURCES_CACHE_KEY = 'emergency_resources'
+SUPPORT_RESOURCES_CACHE_KEY = 'support_resources'
+SUPPORT_RESOURCES_CACHE_TIMEOUT = 60 * 60
+# Bumped on every change; the admin changelist cache keys include it
+SUPPORT_RESOURCE_CACHE_VERSION_KEY = 'support_resource_admin_version'
+EMERGENCY_RESOURCE_FIELDS = ('title', 'description', 'phone_number', 'url')
+SUPPORT_RESOURCE_FIELDS = ('title', 'description', 'phone_number', 'url', 'category', 'is_emergency')
+
 def clean_message_content(content):
     """Clean and sanitize message content"""
     # Remove excessive whitespace
@@ -122,6 +133,36 @@ def validate_mood_entry(mood_level, notes=""):
     
     return errors
 
+async def aget_emergency_resources():
+    """Emergency resources as dicts for JSON responses (cached)"""
+    resources = await cache.aget(EMERGENCY_RESOURCES_CACHE_KEY)
+    if resources is None:
+        resources = [
+            resource async for resource in
+            SupportResource.objects.filter(is_emergency=True).values(*EMERGENCY_RESOURCE_FIELDS)
+        ]
+        await cache.aset(EMERGENCY_RESOURCES_CACHE_KEY, resources, SUPPORT_RESOURCES_CACHE_TIMEOUT)
+    return resources
+
+def _load_support_resources():
+    resources = list(SupportResource.objects.values(*SUPPORT_RESOURCE_FIELDS))
+    return {
+        'emergency_resources': [resource for resource in resources if resource['is_emergency']],
+        'general_resources': [resource for resource in resources if not resource['is_emergency']],
+    }
+
+def get_support_resources():
+    """All resources split into emergency_resources / general_resources (one query, cached)"""
+    return cache.get_or_set(SUPPORT_RESOURCES_CACHE_KEY, _load_support_resources, SUPPORT_RESOURCES_CACHE_TIMEOUT)
+
+def invalidate_support_resource_cache():
+    """Drop cached resource lists after resources are added, changed or removed"""
+    cache.delete_many([EMERGENCY_RESOURCES_CACHE_KEY, SUPPORT_RESOURCES_CACHE_KEY])
+    try:
+        cache.incr(SUPPORT_RESOURCE_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(SUPPORT_RESOURCE_CACHE_VERSION_KEY, 1, None)
+
 class ConversationManager:
     """Helper class for managing conversations"""
     
@@ -151,4 +192,59 @@ class ConversationManager:
         inactive_conversations.update(is_active=False, ended_at=timezone.now())
         
         logger.info(f"Cleaned up {count} inactive conversations")
-        return count
\ No newline at end of file
+        return count
+
+class BulkAdminActionContext:
+    """Collect row changes for a model and write them with bulk_update/bulk_create
+
+    Usage:
+        with BulkAdminActionContext(Message) as ctx:
+            for obj in queryset:
+                ctx.update(obj, fields=['sentiment_score'])
+    """
+
+    def __init__(self, model, batch_size=1000):
+        self.model = model
+        self.batch_size = batch_size
+        self.updated = 0
+        self.created = 0
+        self._pending_updates = {}
+        self._pending_creates = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Only write what was collected if the action finished cleanly
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def update(self, obj, fields):
+        """Queue obj to have the given fields written"""
+        fields = tuple(fields)
+        batch = self._pending_updates.setdefault(fields, [])
+        batch.append(obj)
+        if len(batch) >= self.batch_size:
+            self._flush_updates(fields)
+
+    def create(self, obj):
+        """Queue obj for insertion"""
+        self._pending_creates.append(obj)
+        if len(self._pending_creates) >= self.batch_size:
+            self._flush_creates()
+
+    def flush(self):
+        for fields in list(self._pending_updates):
+            self._flush_updates(fields)
+        self._flush_creates()
+
+    def _flush_updates(self, fields):
+        batch = self._pending_updates.pop(fields, [])
+        if batch:
+            self.updated += self.model.objects.bulk_update(batch, list(fields), batch_size=self.batch_size)
+
+    def _flush_creates(self):
+        batch, self._pending_creates = self._pending_creates, []
+        if batch:
+            self.created += len(self.model.objects.bulk_create(batch, batch_size=self.batch_size))
\ No newline at end of file
@@ -1,5 +1,5 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -7,9 +7,10 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.contrib import messages
-from .models import Conversation, Message, MoodEntry, SupportResource
+from .models import Conversation, Message, MoodEntry
 from .ai_processor import MentalHealthChatbot
 from .forms import CustomUserCreationForm
+from .utils import aget_emergency_resources, get_support_resources
 import json
 import uuid 
 import logging
@@ -17,30 +18,67 @@ from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Number of earlier messages sent to the chatbot as context
+HISTORY_LENGTH = 10
+# The only MoodEntry fields the mood tracker list displays
+MOOD_LIST_FIELDS = ('id', 'mood_level', 'notes', 'created_at')
+
 def index(request):
     """Landing page"""
     return render(request, 'index.html')
 
+def _conversation_uuid(value):
+    """Session conversation_id value as a UUID, or None if missing or malformed"""
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+def _get_or_create_conversation(request):
+    """Conversation for this session, created and stored in the session if missing"""
+    session_id = _conversation_uuid(request.session.get('conversation_id'))
+    if session_id:
+        conversation = Conversation.objects.filter(session_id=session_id).first()
+        if conversation is not None:
+            return conversation
+    conversation = Conversation.objects.create(
+        user=request.user if request.user.is_authenticated else None
+    )
+    request.session['conversation_id'] = str(conversation.session_id)
+    return conversation
+
+async def _aget_or_create_conversation(request):
+    """Async version of _get_or_create_conversation"""
+    session_id = _conversation_uuid(await request.session.aget('conversation_id'))
+    if session_id:
+        conversation = await Conversation.objects.filter(session_id=session_id).afirst()
+        if conversation is not None:
+            return conversation
+    user = await request.auser()
+    conversation = await Conversation.objects.acreate(
+        user=user if user.is_authenticated else None
+    )
+    await request.session.aset('conversation_id', str(conversation.session_id))
+    return conversation
+
+def _history_for_api(messages):
+    """Chat completions style history from (message_type, content) rows, in the given order"""
+    return [
+        {
+            'role': 'user' if message_type == 'user' else 'assistant',
+            'content': content
+        }
+        for message_type, content in messages
+    ]
+
 def chat_view(request):
     """Main chat interface"""
     # Create or get conversation session
-    session_id = request.session.get('conversation_id')
-    if not session_id:
-        conversation = Conversation.objects.create(
-            user=request.user if request.user.is_authenticated else None
-        )
-        request.session['conversation_id'] = str(conversation.session_id)
-    else:
-        try:
-            conversation = Conversation.objects.get(session_id=session_id)
-        except Conversation.DoesNotExist:
-            conversation = Conversation.objects.create(
-                user=request.user if request.user.is_authenticated else None
-            )
-            request.session['conversation_id'] = str(conversation.session_id)
+    conversation = _get_or_create_conversation(request)
 
     # Get conversation history
-    messages = Message.objects.filter(conversation=conversation).order_by('timestamp')
+    # id breaks ties between a user message and its reply, which are inserted together
+    messages = Message.objects.filter(conversation=conversation).order_by('timestamp', 'id')
 
     return render(request, 'chatbot/chat.html', {
         'messages': messages,
@@ -49,8 +87,8 @@ def chat_view(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def process_message(request):
-    """Process user message and return bot response"""
+async def process_message(request):
+    """Process user message and return bot response (async; serve via ASGI for full benefit)"""
     try:
         data = json.loads(request.body)
         user_message = data.get('message', '').strip()
@@ -59,61 +97,40 @@ def process_message(request):
             return JsonResponse({'error': 'No message provided'}, status=400)
 
         # Get or create conversation based on session_id
-        session_id = request.session.get('conversation_id')
-        if not session_id:
-            conversation = Conversation.objects.create(
-                user=request.user if request.user.is_authenticated else None
-            )
-            request.session['conversation_id'] = str(conversation.session_id)
-        else:
-            try:
-                conversation = Conversation.objects.get(session_id=session_id)
-            except Conversation.DoesNotExist:
-                # If a session_id exists but the conversation doesn't, create a new one
-                conversation = Conversation.objects.create(
-                    user=request.user if request.user.is_authenticated else None
-                )
-                request.session['conversation_id'] = str(conversation.session_id)
-
-        # Save user message
-        user_msg = Message.objects.create(
-            conversation=conversation,
-            message_type='user',
-            content=user_message
-        )
-
-        # Generate bot response
+        conversation = await _aget_or_create_conversation(request)
+
+        # Get conversation history for context (last 10 messages), read before the
+        # new message is saved; the chatbot appends that one itself
+        recent_messages = [
+            row async for row in Message.objects.filter(
+                conversation_id=conversation.id
+            ).order_by('-timestamp', '-id').values_list('message_type', 'content')[:HISTORY_LENGTH]
+        ]
+        conversation_history = _history_for_api(reversed(recent_messages))
+
+        # Generate bot response without holding a thread while OpenAI replies
         chatbot = MentalHealthChatbot()
-
-        # Get conversation history for context (last 10 messages)
-        recent_messages = Message.objects.filter(
-            conversation=conversation
-        ).order_by('-timestamp')[:10]
-
-        conversation_history = []
-        for msg in reversed(recent_messages):
-            messages_for_history = {
-                'role': 'user' if msg.message_type == 'user' else 'assistant',
-                'content': msg.content
-            }
-            conversation_history.append(messages_for_history)
-
-        response = chatbot.generate_response(user_message, conversation_history)
-
-        # Save bot response
-        bot_msg = Message.objects.create(
-            conversation=conversation,
-            message_type='bot',
-            content=response['message'],
-            sentiment_score=response.get('sentiment')
-        )
+        response = await chatbot.agenerate_reply(user_message, conversation_history)
+
+        # Save user message and bot response in one INSERT
+        user_msg, bot_msg = await Message.objects.abulk_create([
+            Message(
+                conversation=conversation,
+                message_type='user',
+                content=user_message
+            ),
+            Message(
+                conversation=conversation,
+                message_type='bot',
+                content=response['message'],
+                sentiment_score=response.get('sentiment')
+            ),
+        ])
 
         # Get support resources if crisis detected
         support_resources = []
         if response.get('is_crisis'):
-            support_resources = list(SupportResource.objects.filter(
-                is_emergency=True
-            ).values('title', 'description', 'phone_number', 'url'))
+            support_resources = await aget_emergency_resources()
 
         return JsonResponse({
             'bot_response': response['message'],
@@ -131,19 +148,84 @@ def process_message(request):
         logger.error(f"Unhandled error in process_message: {e}", exc_info=True) # exc_info=True to log full traceback
         return JsonResponse({'error': 'Internal server error processing message.'}, status=500)
 
+@csrf_exempt
+@require_http_methods(["POST"])
+async def process_message_stream(request):
+    """Streaming variant of process_message (async; serve via ASGI for full benefit).
+
+    The response is newline-delimited JSON: {"delta": ...} lines as the reply is
+    generated, then one final line with the same fields process_message returns.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        logger.error(f"JSON Decode Error in process_message_stream. Request Body: {request.body.decode('utf-8')}")
+        return JsonResponse({'error': 'Invalid JSON format in request.'}, status=400)
+    user_message = data.get('message', '').strip()
+
+    if not user_message:
+        return JsonResponse({'error': 'No message provided'}, status=400)
+
+    # Session and conversation are settled before streaming starts, while the
+    # session middleware can still save them
+    conversation = await _aget_or_create_conversation(request)
+
+    recent_messages = [
+        row async for row in Message.objects.filter(
+            conversation_id=conversation.id
+        ).order_by('-timestamp', '-id').values_list('message_type', 'content')[:HISTORY_LENGTH]
+    ]
+    conversation_history = _history_for_api(reversed(recent_messages))
+
+    await Message.objects.acreate(
+        conversation=conversation,
+        message_type='user',
+        content=user_message
+    )
+
+    async def stream():
+        chatbot = MentalHealthChatbot()
+        try:
+            async for chunk in chatbot.agenerate_response(user_message, conversation_history):
+                if isinstance(chunk, dict):
+                    response = chunk
+                else:
+                    yield json.dumps({'delta': chunk}) + '\n'
+
+            bot_msg = await Message.objects.acreate(
+                conversation=conversation,
+                message_type='bot',
+                content=response['message'],
+                sentiment_score=response.get('sentiment')
+            )
+
+            support_resources = []
+            if response.get('is_crisis'):
+                support_resources = await aget_emergency_resources()
+
+            yield json.dumps({
+                'bot_response': response['message'],
+                'is_crisis': response.get('is_crisis', False),
+                'sentiment': response.get('sentiment'),
+                'support_resources': support_resources,
+                'timestamp': bot_msg.timestamp.isoformat(),
+                'message_id': bot_msg.id
+            }) + '\n'
+        except Exception as e:
+            logger.error(f"Unhandled error in process_message_stream: {e}", exc_info=True)
+            yield json.dumps({'error': 'Internal server error processing message.'}) + '\n'
+
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
 @login_required
 def mood_tracker(request):
     """Mood tracking interface"""
     # Ensure a session_id exists for the current user/session for consistent tracking
-    current_session_id_str = request.session.get('conversation_id')
-    if not current_session_id_str:
+    current_session_uuid_obj = _conversation_uuid(request.session.get('conversation_id'))
+    if current_session_uuid_obj is None:
         # If no conversation_id yet, generate a new UUID for this session
-        new_session_uuid = uuid.uuid4()
-        request.session['conversation_id'] = str(new_session_uuid)
-        current_session_id_str = str(new_session_uuid)
-
-    # Convert session_id string to UUID object for database queries
-    current_session_uuid_obj = uuid.UUID(current_session_id_str)
+        current_session_uuid_obj = uuid.uuid4()
+        request.session['conversation_id'] = str(current_session_uuid_obj)
 
     if request.method == 'POST':
         try:
@@ -154,12 +236,8 @@ def mood_tracker(request):
                 return JsonResponse({'error': 'Invalid mood level'}, status=400)
 
             # Try to link to an existing Conversation if one exists for this session
-            conversation_obj = None
-            if current_session_id_str:
-                try:
-                    conversation_obj = Conversation.objects.get(session_id=current_session_uuid_obj)
-                except Conversation.DoesNotExist:
-                    pass # It's okay if no conversation object is found for this session_id
+            # It's okay if no conversation object is found for this session_id
+            conversation_obj = Conversation.objects.filter(session_id=current_session_uuid_obj).first()
 
             MoodEntry.objects.create(
                 user=request.user if request.user.is_authenticated else None, # Link to User if logged in
@@ -185,14 +263,14 @@ def mood_tracker(request):
         # For logged-in users, retrieve their own entries (regardless of session_id, as user is primary)
         recent_moods = MoodEntry.objects.filter(
             user=request.user
-        ).order_by('-created_at')[:10] # Get latest 10 entries
+        ).only(*MOOD_LIST_FIELDS).order_by('-created_at')[:10] # Get latest 10 entries
     else:
         # For anonymous users, retrieve entries associated with their specific session_id
         # Ensure it's entries *not* linked to a user, to avoid mixing anonymous with authenticated
         recent_moods = MoodEntry.objects.filter(
             session_id=current_session_uuid_obj,
             user__isnull=True 
-        ).order_by('-created_at')[:10] # Get latest 10 entries
+        ).only(*MOOD_LIST_FIELDS).order_by('-created_at')[:10] # Get latest 10 entries
 
     return render(request, 'chatbot/mood_tracker.html', {
         'recent_moods': recent_moods
@@ -201,30 +279,26 @@ def mood_tracker(request):
 @login_required
 def resources(request):
     """Mental health resources page"""
-    emergency_resources = SupportResource.objects.filter(is_emergency=True)
-    general_resources = SupportResource.objects.filter(is_emergency=False)
+    support_resources = get_support_resources()
 
     return render(request, 'chatbot/resources.html', {
-        'emergency_resources': emergency_resources,
-        'general_resources': general_resources
+        'emergency_resources': support_resources['emergency_resources'],
+        'general_resources': support_resources['general_resources']
     })
 
 def clear_chat(request):
     """Clear current chat session"""
-    session_id = request.session.get('conversation_id')
+    session_id = _conversation_uuid(request.session.get('conversation_id'))
     if session_id:
-        try:
-            # Mark the conversation as inactive if it exists
-            conversation = Conversation.objects.get(session_id=uuid.UUID(session_id)) # Convert to UUID
-            conversation.is_active = False
-            conversation.ended_at = timezone.now() # Ensure ended_at is set for cleanup
-            conversation.save()
-        except Conversation.DoesNotExist:
-            pass # No active conversation for this session_id, nothing to mark inactive
-
-        # Remove the conversation_id from the session to start fresh
-        if 'conversation_id' in request.session:
-            del request.session['conversation_id']
+        # Mark the conversation as inactive if it exists (ended_at is set for cleanup);
+        # a single UPDATE, which matches nothing if the conversation is gone
+        Conversation.objects.filter(session_id=session_id).update(
+            is_active=False,
+            ended_at=timezone.now()
+        )
+
+    # Remove the conversation_id from the session to start fresh
+    request.session.pop('conversation_id', None)
 
     return redirect('chat')
 
@@ -279,10 +353,11 @@ def delete_account(request):
 @login_required
 def delete_mood_entry(request, mood_id):
     """Delete a specific mood entry"""
-    mood_entry = get_object_or_404(MoodEntry, id=mood_id, user=request.user)
-
     if request.method == 'POST':
-        mood_entry.delete()
+        # One filtered DELETE instead of fetching the entry first
+        deleted, _ = MoodEntry.objects.filter(id=mood_id, user=request.user).delete()
+        if not deleted:
+            return JsonResponse({'status': 'not_found', 'error': 'Mood entry not found'}, status=404)
         return JsonResponse({'status': 'success', 'message': 'Mood entry deleted successfully!'})
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
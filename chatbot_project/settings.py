@@ -25,6 +25,7 @@ ALLOWED_HOSTS = [
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',  # Makes runserver serve ASGI, so the async chat views get one event loop
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -39,6 +40,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this for static files on Render
     'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag + 304 for repeat page loads
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,12 +68,20 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'chatbot_project.wsgi.application'
+ASGI_APPLICATION = 'chatbot_project.asgi.application'
 
 # Database - Updated for Render
 if 'DATABASE_URL' in os.environ:
     import dj_database_url
+    # Keep connections open between requests instead of reconnecting per request;
+    # health checks drop ones the server has closed. Set DB_CONN_MAX_AGE=0 when
+    # a pooler such as PgBouncer sits in front of the database.
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            os.environ.get('DATABASE_URL'),
+            conn_max_age=config('DB_CONN_MAX_AGE', default=60, cast=int),
+            conn_health_checks=True,
+        )
     }
 else:
     DATABASES = {
@@ -123,7 +133,9 @@ LOGIN_URL = '/login/'
 
 # Session configuration
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
+# Saving on every request costs a session UPDATE per hit; sessions are saved only
+# when modified, so they expire SESSION_COOKIE_AGE after the last change
+SESSION_SAVE_EVERY_REQUEST = config('SESSION_SAVE_EVERY_REQUEST', default=False, cast=bool)
 
 # CORS settings - Updated for Render
 CORS_ALLOWED_ORIGINS = [